@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the v2 security dues processor.
+Generates synthetic trackers at several sizes, times process_spreadsheet,
+generate_summary and output writing on each in a fresh process, and compares
+rows per second, stage times and peak RSS against a stored baseline. With
+--record-memory it instead measures bytes per house-year of dict-shaped houses
+versus the dues_records types.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from dues_records import MONTH_NAMES, House
+from dues_synthetic import generate_tracker
+
+# (houses, years) per run
+DEFAULT_SIZES = ((250, 10), (1000, 10), (4000, 10))
+
+STAGES = ('process_spreadsheet', 'generate_summary', 'write_outputs')
+
+# A metric this much worse than the baseline is reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Stages faster than this are too noisy to call regressions
+MIN_TIMED_SECONDS = 0.05
+
+def parse_size(text):
+    """'1000x10' -> (1000, 10)"""
+    houses, _, years = text.lower().partition('x')
+    return int(houses), int(years or 10)
+
+def size_key(houses, years):
+    return f"{houses}x{years}"
+
+def run_one(tracker_file, num_rows, engine, streaming, output_dir):
+    """Time each stage on one tracker in this process. Returns the metrics dict."""
+    # Imported here so the parent process stays small and its RSS is not counted
+    from dues_metrics import RunMetrics
+    from process_security_dues_v2 import generate_summary, process_spreadsheet, write_import_files
+
+    stages = {}
+    metrics = RunMetrics()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        clean_houses, flagged_houses, stats, _ = process_spreadsheet(
+            tracker_file, streaming=streaming, engine=engine, metrics=metrics)
+        stages['process_spreadsheet'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = generate_summary(stats, tracker_file.name)
+        stages['generate_summary'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_import_files(clean_houses, flagged_houses, stats, tracker_file.name, datetime.now().isoformat(),
+                           output_dir / 'security_dues_import_main.json',
+                           output_dir / 'security_dues_import_flagged.json')
+        with open(output_dir / 'security_dues_export_summary.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        stages['write_outputs'] = time.perf_counter() - start
+
+    total = sum(stages.values())
+    return {
+        'rows': num_rows,
+        'houses': stats.total_houses,
+        'stages': stages,
+        # Breakdown of process_spreadsheet by the processor's own stage timers
+        'process_stages': dict(metrics.stages),
+        'counters': dict(metrics.counters),
+        'wall_time': total,
+        'rows_per_sec': num_rows / stages['process_spreadsheet'],
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+def run_size(houses, years, args):
+    """Generate (or reuse) the tracker for a size and benchmark it in a child process."""
+    tracker_file = args.work_dir / f"synthetic_{size_key(houses, years)}_seed{args.seed}.xlsx"
+    rows_file = tracker_file.with_suffix('.rows')
+    if not tracker_file.exists() or not rows_file.exists():
+        print(f"  Generating {tracker_file.name}...")
+        rows_file.write_text(str(generate_tracker(tracker_file, houses, years, args.seed)))
+
+    command = [sys.executable, __file__, '--run-one', str(tracker_file), '--rows', rows_file.read_text(),
+               '--engine', args.engine, '--work-dir', str(args.work_dir)]
+    if args.streaming:
+        command.append('--streaming')
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Print each metric against the baseline. Returns the list of regressions."""
+    regressions = []
+    # (metric, higher is better)
+    metrics = [('rows_per_sec', True), ('wall_time', False), ('peak_rss_mb', False)] + \
+        [(f'stages.{stage}', False) for stage in STAGES]
+
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"\n{key}: no baseline")
+            continue
+        print(f"\n{key}:")
+        for metric, higher_is_better in metrics:
+            current, previous = result, base
+            for part in metric.split('.'):
+                current, previous = current[part], previous[part]
+            change = (current - previous) / previous if previous else 0.0
+            worse = -change if higher_is_better else change
+            timed = metric == 'wall_time' or metric.startswith('stages.')
+            noisy = timed and max(current, previous) < MIN_TIMED_SECONDS
+            status = 'REGRESSION' if worse > tolerance and not noisy else ''
+            print(f"  {metric:32} {previous:12,.3f} -> {current:12,.3f} ({change:+.1%}) {status}")
+            if status:
+                regressions.append(f"{key} {metric}")
+    return regressions
+
+def _random_amount(rng):
+    return float(rng.choice((0, 3000, 5000, 7000, 10000)))
+
+def benchmark_memory(num_houses=2000, years_per_house=10, seed=1):
+    """Measure bytes per house-year for dict-shaped houses versus House records."""
+
+    def build_dicts(rng, years_per_house):
+        houses = {}
+        for h in range(num_houses):
+            years = []
+            for y in range(years_per_house):
+                rate = _random_amount(rng)
+                paid = _random_amount(rng)
+                years.append({
+                    'year': 2015 + y,
+                    'rate': rate,
+                    'payments': {month: _random_amount(rng) for month in MONTH_NAMES},
+                    'paid': paid,
+                    'expected': rate * 12,
+                    'year_balance': rate * 12 - paid,
+                    'flags': []
+                })
+            houses[str(h)] = {
+                'house_number': str(h),
+                'street_code': str(h),
+                'primary_name': None,
+                'aliases': [],
+                'move_in_month': None,
+                'move_out_month': None,
+                'status': 'ACTIVE',
+                'years': years,
+                'flags': [],
+                'property_type': 'residential',
+                'rate_tier': None
+            }
+        return houses
+
+    def build_records(rng, years_per_house):
+        houses = {}
+        for h in range(num_houses):
+            house = House(str(h), str(h))
+            for y in range(years_per_house):
+                rate = _random_amount(rng)
+                paid = _random_amount(rng)
+                house.add_year(2015 + y, rate, paid, [_random_amount(rng) for _ in MONTH_NAMES])
+            houses[str(h)] = house
+        return houses
+
+    def measure(build, years):
+        tracemalloc.start()
+        houses = build(random.Random(seed), years)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del houses
+        return current
+
+    # Total bytes per house-year, and the marginal cost of one more year per house
+    # (house-level overhead cancels out between the two sizes)
+    results = {}
+    for label, build in (('dict', build_dicts), ('record', build_records)):
+        single = measure(build, years_per_house)
+        double = measure(build, years_per_house * 2)
+        results[label] = {
+            'per_house_year': single / (num_houses * years_per_house),
+            'marginal': (double - single) / (num_houses * years_per_house)
+        }
+
+    return results
+
+def print_memory(sizes):
+    """Print the record memory benchmark for each (houses, years) size."""
+    for houses, years in sizes:
+        results = benchmark_memory(houses, years)
+        print(f"Houses: {houses}, years per house: {years}")
+        for metric in ('per_house_year', 'marginal'):
+            dict_bytes = results['dict'][metric]
+            record_bytes = results['record'][metric]
+            print(f"  {metric}: dict {dict_bytes:,.0f} B, record {record_bytes:,.0f} B "
+                  f"({dict_bytes / record_bytes:.1f}x smaller)")
+
+def main():
+    base_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description='Benchmark the v2 dues processor on synthetic trackers.')
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=list(DEFAULT_SIZES), metavar='HOUSESxYEARS',
+                        help='Tracker sizes to run (default: 250x10 1000x10 4000x10)')
+    parser.add_argument('--engine', choices=('openpyxl', 'native'), default='openpyxl')
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--work-dir', type=Path, default=base_dir / 'importdata' / 'benchmark',
+                        help='Where generated trackers and benchmark outputs are kept')
+    parser.add_argument('--baseline', type=Path, default=base_dir / 'importdata' / 'benchmark_baseline.json',
+                        help='Baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Fraction a metric may worsen before it counts as a regression')
+    parser.add_argument('--record-memory', action='store_true',
+                        help='Measure the memory of House records versus dict houses at each size instead')
+    parser.add_argument('--run-one', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.record_memory:
+        print_memory(args.sizes)
+        return
+
+    args.work_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.rows, args.engine, args.streaming, args.work_dir)))
+        return
+
+    print(f"Benchmarking engine={args.engine}" + (" (streaming)" if args.streaming else ""))
+    results = {}
+    for houses, years in args.sizes:
+        key = size_key(houses, years)
+        print(f"\n{key}:")
+        result = results[key] = run_size(houses, years, args)
+        stage_times = ', '.join(f"{stage} {result['stages'][stage]:.2f}s" for stage in STAGES)
+        print(f"  {result['rows']:,} rows, {result['houses']:,} houses: {result['rows_per_sec']:,.0f} rows/sec, "
+              f"{result['wall_time']:.2f}s ({stage_times}), peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    run = {
+        'engine': args.engine,
+        'streaming': args.streaming,
+        'date': datetime.now().isoformat(),
+        'results': results
+    }
+
+    regressions = []
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline['engine'], baseline['streaming']) != (args.engine, args.streaming):
+            print(f"\nBaseline {args.baseline} was recorded with engine={baseline['engine']}, "
+                  f"streaming={baseline['streaming']}; not comparing")
+        else:
+            print(f"\nAgainst baseline from {baseline['date']}:")
+            regressions = compare(results, baseline['results'], args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved baseline: {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Block cache for incremental reprocessing of security dues trackers.
+Fingerprints the raw cells of each house block and keeps its parsed result next
+to the previous run's output, so unchanged blocks are reused instead of re-parsed.
+"""
+
+import hashlib
+import json
+from array import array
+
+CACHE_VERSION = 5
+
+def fingerprint_rows(rows):
+    """Hash the values and highlight classes of a block's rows."""
+    digest = hashlib.blake2b(digest_size=16)
+    for values, highlights in rows:
+        digest.update(repr(values).encode('utf-8'))
+        digest.update(repr(highlights).encode('utf-8'))
+    return digest.hexdigest()
+
+def block_to_json(block):
+    return {
+        'house_number': block['house_number'],
+        'names': [[name, is_primary] for name, is_primary in block['names']],
+        'year_numbers': block['year_numbers'].tolist(),
+        'year_values': block['year_values'].tolist(),
+        'year_move_ins': block['year_move_ins'].tolist(),
+        'year_move_outs': block['year_move_outs'].tolist(),
+        'move_in_month': block['move_in_month'],
+        'move_out_month': block['move_out_month'],
+        'move_in_bits': block['move_in_bits'],
+        'move_out_bits': block['move_out_bits'],
+        'resume_bits': block['resume_bits'],
+        'inactive': block['inactive'],
+        'unparsed_cells': block['unparsed_cells']
+    }
+
+def block_from_json(data, fingerprint):
+    return {
+        'house_number': data['house_number'],
+        'names': [(name, is_primary) for name, is_primary in data['names']],
+        'year_numbers': array('i', data['year_numbers']),
+        'year_values': array('d', data['year_values']),
+        'year_move_ins': array('H', data['year_move_ins']),
+        'year_move_outs': array('H', data['year_move_outs']),
+        'move_in_month': data['move_in_month'],
+        'move_out_month': data['move_out_month'],
+        'move_in_bits': data['move_in_bits'],
+        'move_out_bits': data['move_out_bits'],
+        'resume_bits': data['resume_bits'],
+        'inactive': data['inactive'],
+        'unparsed_cells': data['unparsed_cells'],
+        'fingerprint': fingerprint
+    }
+
+class BlockCache:
+    """Parsed house blocks of the previous run, keyed by block fingerprint.
+
+    layout describes the parsing rules the blocks were produced under (column
+    positions, start row, processor version); a saved cache written under a
+    different layout is ignored. Blocks seen in this run are collected with
+    put() and replace the previous set on save().
+    """
+
+    def __init__(self, layout, blocks=None):
+        self.layout = layout
+        self.previous = blocks or {}
+        self.current = {}
+
+    @classmethod
+    def load(cls, path, layout):
+        """Read a saved cache, or start empty if it is missing or stale."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(layout)
+
+        if data.get('version') != CACHE_VERSION or data.get('layout') != layout:
+            return cls(layout)
+
+        blocks = {
+            fingerprint: block_from_json(block, fingerprint)
+            for fingerprint, block in data['blocks'].items()
+        }
+        return cls(layout, blocks)
+
+    def get(self, fingerprint):
+        """Cached block for a fingerprint, or None."""
+        return self.previous.get(fingerprint)
+
+    def put(self, block):
+        """Record a block produced in this run."""
+        self.current[block['fingerprint']] = block
+
+    def save(self, path):
+        data = {
+            'version': CACHE_VERSION,
+            'layout': self.layout,
+            'blocks': {fingerprint: block_to_json(block) for fingerprint, block in self.current.items()}
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
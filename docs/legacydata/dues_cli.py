@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for the legacy data tools.
+One command with inspect, find-start, process and summarize subcommands. Each
+subcommand's module is imported only when it runs, so --help and summarize
+start without loading openpyxl, NumPy or the database drivers.
+"""
+
+import importlib
+import sys
+from pathlib import Path
+
+# subcommand -> (module, description)
+COMMANDS = {
+    'inspect': ('inspect_excel', 'Show the size and first rows of a workbook'),
+    'find-start': ('find_data_start', 'Find the header row where tracker data starts'),
+    'process': ('process_security_dues_v2', 'Process a tracker into import files (--v1 for the v1 interpretation)'),
+    'summarize': ('dues_summary', 'Print the summary report of an earlier run from its JSON outputs')
+}
+
+V1_MODULE = 'process_security_dues'
+
+def usage():
+    lines = [f"usage: {Path(sys.argv[0]).name} <command> [options]", "", "commands:"]
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, description) in COMMANDS.items():
+        lines.append(f"  {name:{width}}  {description}")
+    lines.append("")
+    lines.append("Run a command with --help for its options.")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        sys.exit(f"\nUnknown command: {command}")
+
+    module_name = COMMANDS[command][0]
+    if command == 'process' and '--v1' in args:
+        args.remove('--v1')
+        module_name = V1_MODULE
+
+    # The legacy scripts import their siblings by module name
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    module = importlib.import_module(module_name)
+    sys.argv[0] = f"{Path(sys.argv[0]).name} {command}"
+    module.main(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Delta exports between security dues processing runs.
+Each house record is hashed in a canonical JSON form and compared with the
+previous run's import files, giving the houses added, changed and removed
+and a per-field summary of what changed.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+
+from dues_ndjson import read_ndjson
+
+OUTPUT_FORMATS = ('json', 'ndjson')
+
+def house_hash(record):
+    """Digest of a house record, independent of key order and formatting."""
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+def read_import_file(path):
+    """(export_metadata, house records) of one import file, .json or .ndjson."""
+    if Path(path).suffix == '.ndjson':
+        metadata, houses = {}, []
+        for record in read_ndjson(path):
+            if record['record'] == 'export_metadata':
+                metadata = record['export_metadata']
+            elif record['record'] == 'house':
+                houses.append(record['house'])
+        return metadata, houses
+    with open(path) as f:
+        data = json.load(f)
+    return data['export_metadata'], data['houses']
+
+def read_run(output_dir):
+    """House records of the run in an output directory, as (export_metadata, {house_number: record}).
+
+    The main and flagged files of the newest format present are read; a
+    directory with no run gives ({}, {}).
+    """
+    runs = [
+        (output_dir / f'security_dues_import_main.{fmt}', output_dir / f'security_dues_import_flagged.{fmt}')
+        for fmt in OUTPUT_FORMATS
+        if (output_dir / f'security_dues_import_main.{fmt}').exists()
+    ]
+    if not runs:
+        return {}, {}
+    main_file, flagged_file = max(runs, key=lambda files: files[0].stat().st_mtime)
+
+    metadata, houses = read_import_file(main_file)
+    if flagged_file.exists():
+        houses += read_import_file(flagged_file)[1]
+    return metadata, {house['house_number']: house for house in houses}
+
+def changed_fields(old, new):
+    """Fields that differ between two house records, sorted.
+
+    Year rows are compared by position, so a changed row reports its fields as
+    years.<field>; rows added or dropped report years.rows.
+    """
+    fields = set()
+    for key in old.keys() | new.keys():
+        if key == 'years':
+            old_years, new_years = old.get('years', []), new.get('years', [])
+            if len(old_years) != len(new_years):
+                fields.add('years.rows')
+            for old_year, new_year in zip(old_years, new_years):
+                fields.update(f'years.{field}' for field in old_year.keys() | new_year.keys()
+                              if old_year.get(field) != new_year.get(field))
+        elif old.get(key) != new.get(key):
+            fields.add(key)
+    return sorted(fields)
+
+def diff_runs(previous, houses):
+    """Compare finalized House objects with the previous run's {house_number: record}.
+
+    Returns {'added', 'changed', 'removed': [delta records], 'unchanged': count,
+    'field_changes': {field: houses changed}}. Added and changed records carry
+    the new house record; removed ones only the house number and old hash.
+    """
+    delta = {'added': [], 'changed': [], 'removed': [], 'unchanged': 0}
+    field_changes = Counter()
+    seen = set()
+
+    for house in houses:
+        record = house.to_dict()
+        house_number = record['house_number']
+        digest = house_hash(record)
+        seen.add(house_number)
+
+        old = previous.get(house_number)
+        if old is None:
+            delta['added'].append({'change': 'added', 'house_number': house_number, 'hash': digest,
+                                   'house': record})
+            continue
+        old_digest = house_hash(old)
+        if old_digest == digest:
+            delta['unchanged'] += 1
+            continue
+        fields = changed_fields(old, record)
+        field_changes.update(fields)
+        delta['changed'].append({'change': 'changed', 'house_number': house_number, 'hash': digest,
+                                 'previous_hash': old_digest, 'fields': fields, 'house': record})
+
+    for house_number, old in previous.items():
+        if house_number not in seen:
+            delta['removed'].append({'change': 'removed', 'house_number': house_number,
+                                     'previous_hash': house_hash(old)})
+
+    delta['field_changes'] = dict(sorted(field_changes.items()))
+    return delta
+
+def write_delta(delta, path, metadata):
+    """Write a delta as one JSON document: metadata with counts, field summary and the delta records."""
+    output = {
+        'export_metadata': {
+            **metadata,
+            'added': len(delta['added']),
+            'changed': len(delta['changed']),
+            'removed': len(delta['removed']),
+            'unchanged': delta['unchanged']
+        },
+        'field_changes': delta['field_changes'],
+        'houses': delta['added'] + delta['changed'] + delta['removed']
+    }
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
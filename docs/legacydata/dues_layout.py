@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Column layout detection for legacy dues trackers.
+Finds the header row while the sheet is being read, maps each column by its
+header text, and caches the result per workbook fingerprint.
+"""
+
+import hashlib
+import json
+
+from dues_records import MONTH_NAMES
+
+# Field order the processor reads rows in (the v2 tracker's columns A-S)
+CANONICAL_FIELDS = ('house_no', 'status', 'name', 'contacts', 'year', 'rate') + \
+    tuple(month.lower() for month in MONTH_NAMES) + ('paid',)
+
+REQUIRED_FIELDS = ('house_no', 'name', 'year', 'rate', 'paid') + tuple(month.lower() for month in MONTH_NAMES)
+
+# How far down and across to look for the header row
+HEADER_SCAN_ROWS = 50
+HEADER_SCAN_COLS = 26
+
+LAYOUT_CACHE_VERSION = 1
+
+def header_field(value):
+    """Field named by a header cell, or None."""
+    if not isinstance(value, str):
+        return None
+    text = value.upper().replace('(', '').replace(')', '').replace("'", '').strip()
+    if not text:
+        return None
+    if 'HOUSE' in text:
+        return 'house_no'
+    if text.startswith('STATUS'):
+        return 'status'
+    if 'NAME' in text:
+        return 'name'
+    if 'CONTACT' in text or 'PHONE' in text:
+        return 'contacts'
+    if text == 'YEAR':
+        return 'year'
+    if 'RATE' in text:
+        return 'rate'
+    if text == 'PAID' or text == 'TOTAL PAID':
+        return 'paid'
+    if 'DUE' in text and 'DEBT' in text:
+        return 'due_debt'
+    if 3 <= len(text) <= 9:
+        for month in MONTH_NAMES:
+            if text.startswith(month.upper()):
+                return month.lower()
+    return None
+
+def is_header_row(values):
+    """Check if a row holds the HOUSE NO header."""
+    return any(
+        header_field(value) == 'house_no' and 'NO' in value.upper()
+        for value in values
+    )
+
+class SheetLayout:
+    """Where each field sits in a tracker sheet.
+
+    columns maps field names to 1-based column numbers; data rows start right
+    after header_row. project() reorders a row read from the sheet into
+    CANONICAL_FIELDS order, with None for fields the sheet does not have.
+    """
+
+    __slots__ = ('header_row', 'columns', 'width', '_indices', '_prefix')
+
+    def __init__(self, header_row, columns):
+        self.header_row = header_row
+        self.columns = dict(columns)
+        self.width = max(self.columns.values())
+        self._indices = tuple(
+            self.columns[field] - 1 if field in self.columns else None
+            for field in CANONICAL_FIELDS
+        )
+        # Sheets already in canonical order only need trimming
+        self._prefix = self._indices == tuple(range(len(CANONICAL_FIELDS)))
+
+    @classmethod
+    def from_header(cls, header_row, values):
+        """Map the columns of a header row; raises ValueError if a required field is missing."""
+        columns = {}
+        for col, value in enumerate(values, 1):
+            field = header_field(value)
+            if field and field not in columns:
+                columns[field] = col
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+        if missing:
+            raise ValueError(f"Header row {header_row} has no column for: {', '.join(missing)}")
+        return cls(header_row, columns)
+
+    @property
+    def data_start_row(self):
+        return self.header_row + 1
+
+    def project(self, values):
+        """Reorder a sheet row into CANONICAL_FIELDS order."""
+        if self._prefix:
+            return values[:len(CANONICAL_FIELDS)]
+        width = len(values)
+        return [values[i] if i is not None and i < width else None for i in self._indices]
+
+    def describe(self):
+        """Short description for the run report."""
+        return f"header row {self.header_row}, " + ', '.join(
+            f"{field}={col}" for field, col in sorted(self.columns.items(), key=lambda item: item[1])
+        )
+
+    def to_json(self):
+        return {'header_row': self.header_row, 'columns': self.columns}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['header_row'], data['columns'])
+
+    def __eq__(self, other):
+        return (isinstance(other, SheetLayout) and self.header_row == other.header_row
+                and self.columns == other.columns)
+
+# Layout assumed when a sheet has no recognisable header (the v2 tracker)
+V2_LAYOUT = SheetLayout(15, {
+    'house_no': 1, 'status': 2, 'name': 3, 'contacts': 4, 'year': 5, 'rate': 6,
+    **{month.lower(): 7 + i for i, month in enumerate(MONTH_NAMES)},
+    'paid': 19, 'due_debt': 20
+})
+
+class LayoutRows:
+    """Data rows of a sheet in canonical order, detecting the layout on the way.
+
+    raw_rows yields (row_idx, values, highlights). Without a known layout the
+    first HEADER_SCAN_ROWS rows are searched for the header; if there is none,
+    default is assumed and the rows read so far are replayed from its data
+    start. The layout in use is available as .layout once iteration starts.
+    """
+
+    def __init__(self, raw_rows, layout=None, default=V2_LAYOUT):
+        self.raw_rows = raw_rows
+        self.layout = layout
+        self.default = default
+
+    def __iter__(self):
+        raw_rows = iter(self.raw_rows)
+
+        if self.layout is None:
+            scanned = []
+            for row_idx, values, highlights in raw_rows:
+                if is_header_row(values):
+                    self.layout = SheetLayout.from_header(row_idx, values)
+                    break
+                scanned.append((row_idx, values, highlights))
+                if row_idx >= HEADER_SCAN_ROWS:
+                    break
+
+            if self.layout is None:
+                self.layout = self.default
+                print(f"  No header row in the first {HEADER_SCAN_ROWS} rows, "
+                      f"assuming data from row {self.layout.data_start_row}")
+                project = self.layout.project
+                for row_idx, values, highlights in scanned:
+                    if row_idx >= self.layout.data_start_row:
+                        yield project(values), project(highlights)
+
+        project = self.layout.project
+        start_row = self.layout.data_start_row
+        for row_idx, values, highlights in raw_rows:
+            if row_idx >= start_row:
+                yield project(values), project(highlights)
+
+def workbook_fingerprint(file_path):
+    """Content hash of a workbook file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class LayoutCache:
+    """Detected sheet layouts, keyed by workbook fingerprint.
+
+    Each workbook entry holds the layout of every sheet read from it (the
+    active sheet under '') and, once known, its list of data sheets. A workbook
+    seen before is read straight from its data rows with no header search; any
+    edit to the file changes its fingerprint.
+    """
+
+    def __init__(self, workbooks=None):
+        self.workbooks = workbooks or {}
+
+    @classmethod
+    def load(cls, path):
+        """Read a saved cache, or start empty if it is missing or stale."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('version') != LAYOUT_CACHE_VERSION:
+            return cls()
+        return cls(data['workbooks'])
+
+    def _entry(self, fingerprint):
+        return self.workbooks.setdefault(fingerprint, {'data_sheets': None, 'layouts': {}})
+
+    def get(self, fingerprint, sheet=None):
+        """Cached layout of a sheet (default: the active one), or None."""
+        data = self.workbooks.get(fingerprint, {}).get('layouts', {}).get(sheet or '')
+        return SheetLayout.from_json(data) if data else None
+
+    def put(self, fingerprint, sheet, layout):
+        self._entry(fingerprint)['layouts'][sheet or ''] = layout.to_json()
+
+    def get_data_sheets(self, fingerprint):
+        """Cached data sheet names of a workbook, or None."""
+        return self.workbooks.get(fingerprint, {}).get('data_sheets')
+
+    def put_data_sheets(self, fingerprint, sheets):
+        self._entry(fingerprint)['data_sheets'] = list(sheets)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'version': LAYOUT_CACHE_VERSION, 'workbooks': self.workbooks}, f, indent=2)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Month-level dues ledgers for point-in-time balances.
+Charges and payments of every house are laid out by calendar month and kept as
+per-house prefix sums, built once from the PaymentTensor. A house's balance as
+of any month is a binary search, and the whole estate's balance for a month is
+one batched search.
+"""
+
+import numpy as np
+
+from dues_occupancy import MONTHS_PER_YEAR, month_index, month_key
+
+class HouseLedger:
+    """Running charges and payments of one house, by month.
+
+    months holds the calendar month indices (see dues_occupancy) that have a
+    charge or payment, ascending; charged and paid are the running totals up
+    to and including each of those months. Balances are paid - charged, so
+    positive is credit, as with net_position.
+    """
+
+    __slots__ = ('months', 'charged', 'paid')
+
+    def __init__(self, months, charged, paid):
+        self.months = months
+        self.charged = charged
+        self.paid = paid
+
+    def _position(self, year, month):
+        return int(np.searchsorted(self.months, month_index(year, month), side='right')) - 1
+
+    def totals_as_of(self, year, month):
+        """(charged, paid) up to the end of a month."""
+        i = self._position(year, month)
+        if i < 0:
+            return 0.0, 0.0
+        return float(self.charged[i]), float(self.paid[i])
+
+    def balance_as_of(self, year, month):
+        """Payments minus charges up to the end of a month (positive is credit)."""
+        charged, paid = self.totals_as_of(year, month)
+        return paid - charged
+
+    @property
+    def balance(self):
+        """Balance after the last month on record."""
+        return float(self.paid[-1] - self.charged[-1]) if len(self.months) else 0.0
+
+    def statement(self):
+        """Monthly lines for a resident statement: month, charged, paid and running balance."""
+        charged = np.diff(self.charged, prepend=0.0)
+        paid = np.diff(self.paid, prepend=0.0)
+        return [
+            {'month': month_key(int(month)), 'charged': float(charged[i]), 'paid': float(paid[i]),
+             'balance': float(self.paid[i] - self.charged[i])}
+            for i, month in enumerate(self.months)
+        ]
+
+def build_house_ledgers(tensor):
+    """One HouseLedger per house of a PaymentTensor, in house order.
+
+    Each record books its rate in every chargeable month and its month cells
+    as payments. The PAID column is the year's total (as in net_position), so
+    any part of it the month cells do not account for is booked in December;
+    a house's final ledger balance is then its net position.
+    """
+    first_months = month_index(tensor.record_years.astype(np.int64), 1)
+    months = (first_months[:, None] + np.arange(MONTHS_PER_YEAR)).ravel()
+    charges = tensor.monthly_charges().ravel()
+    payments = tensor.amounts.copy()
+    payments[:, -1] += tensor.paid - tensor.monthly_sum()
+    payments = payments.ravel()
+    houses = np.repeat(tensor.house_idx, MONTHS_PER_YEAR)
+
+    active = (charges != 0) | (payments != 0)
+    months, charges, payments, houses = months[active], charges[active], payments[active], houses[active]
+
+    # One entry per (house, month), houses in order and months ascending within each
+    low = months.min() if len(months) else 0
+    span = (months.max() - low + 1) if len(months) else 1
+    keys, inverse = np.unique(houses * span + (months - low), return_inverse=True)
+    charged = np.bincount(inverse, weights=charges, minlength=len(keys))
+    paid = np.bincount(inverse, weights=payments, minlength=len(keys))
+    entry_months = keys % span + low
+    offsets = np.searchsorted(keys // span, np.arange(tensor.num_houses + 1))
+
+    ledgers = []
+    for h in range(tensor.num_houses):
+        start, end = offsets[h], offsets[h + 1]
+        ledgers.append(HouseLedger(entry_months[start:end], np.cumsum(charged[start:end]),
+                                   np.cumsum(paid[start:end])))
+    return ledgers
+
+class EstateLedger:
+    """The house ledgers of an estate packed end to end for batched queries.
+
+    Entries are keyed by (house position, month) in one sorted array, so the
+    last entry of every house up to a month is found with a single
+    searchsorted over all houses.
+    """
+
+    def __init__(self, house_numbers, ledgers):
+        self.house_numbers = list(house_numbers)
+        counts = np.array([len(ledger.months) for ledger in ledgers], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        months = np.concatenate([ledger.months for ledger in ledgers]) if ledgers else np.zeros(0, np.int64)
+        self.low = int(months.min()) if len(months) else 0
+        self.span = int(months.max()) - self.low + 2 if len(months) else 2
+        house_idx = np.repeat(np.arange(len(ledgers), dtype=np.int64), counts)
+        # Offset by one so a month before the first entry still falls inside its house's key range
+        self.keys = house_idx * self.span + (months - self.low + 1)
+        self.charged = np.concatenate([ledger.charged for ledger in ledgers]) if ledgers else np.zeros(0)
+        self.paid = np.concatenate([ledger.paid for ledger in ledgers]) if ledgers else np.zeros(0)
+
+    @classmethod
+    def from_houses(cls, houses):
+        """Pack the ledgers of finalized House objects."""
+        houses = list(houses)
+        return cls([house.house_number for house in houses], [house.ledger for house in houses])
+
+    def balances_as_of(self, year, month):
+        """Balance of every house up to the end of a month, in house order (positive is credit)."""
+        target = np.clip(month_index(year, month) - self.low + 1, 0, self.span - 1)
+        house_base = np.arange(len(self.house_numbers), dtype=np.int64) * self.span
+        pos = np.searchsorted(self.keys, house_base + target, side='right') - 1
+        # A house with no entry up to the month finds the previous house's last entry (or none)
+        has_entry = pos >= self.offsets[:-1]
+        pos = np.maximum(pos, 0)
+        if not len(self.keys):
+            return np.zeros(len(self.house_numbers))
+        return np.where(has_entry, self.paid[pos] - self.charged[pos], 0.0)
+
+    def summary_as_of(self, year, month):
+        """Estate totals and per-house balances up to the end of a month."""
+        balances = self.balances_as_of(year, month)
+        return {
+            'month': f"{year}-{month:02d}",
+            'net_position': float(balances.sum()),
+            'total_debt': float(np.abs(balances[balances < 0]).sum()),
+            'total_credit': float(balances[balances > 0].sum()),
+            'houses': dict(zip(self.house_numbers, balances.tolist()))
+        }
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Transaction-to-house matching for security dues imports.
+Builds exact, token and trigram indexes once over house numbers, street codes,
+primary names and aliases, then scores bank narrations against them.
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from dues_names import jaccard
+from dues_records import normalize_name
+
+TOKEN_RE = re.compile(r'[A-Z0-9]+')
+
+# House references in narrations: "HSE 12", "HOUSE NO 9B", "H/NO 14A"
+HOUSE_REF_RE = re.compile(r'\b(?:HOUSE|HSE|H/NO)\s*(?:NO\.?|NUMBER)?\s*[:.\-]?\s*(\d+\s?[A-Z]?)\b')
+
+# Honorifics and role words that say nothing about who a resident is
+TITLES = frozenset({
+    'MR', 'MRS', 'MS', 'MISS', 'DR', 'SIR', 'CHIEF', 'PASTOR', 'REV', 'PROF', 'ENGR', 'BARR',
+    'ALHAJI', 'ALHAJA', 'APOSTLE', 'LANDLORD', 'AND', 'THE', 'LTD', 'NEW'
+})
+
+MIN_TOKEN_LENGTH = 2
+
+# Narration tokens not in the name vocabulary are matched by trigrams if at least this long and similar
+FUZZY_MIN_LENGTH = 4
+FUZZY_SIMILARITY = 0.5
+
+# Confidence given by an explicit house number and by its street code alone
+HOUSE_REF_CONFIDENCE = 0.9
+STREET_REF_CONFIDENCE = 0.4
+
+# Candidates below this confidence are not reported
+MIN_CONFIDENCE = 0.3
+
+def name_tokens(name):
+    """Identifying tokens of a resident name."""
+    return [
+        token for token in TOKEN_RE.findall(normalize_name(name))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in TITLES and not token.isdigit()
+    ]
+
+def token_trigrams(token):
+    padded = f'#{token}#'
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def house_key(house_number):
+    """Comparison key for a house number: upper case with spaces removed."""
+    return ''.join(str(house_number).upper().split())
+
+class HouseMatcher:
+    """Ranks the houses a bank narration is likely paying for.
+
+    Indexes, built once:
+      exact   - house number key -> house, street code -> houses
+      names   - normalized primary name / alias -> houses
+      tokens  - name token -> {house: [name ids]}, with an IDF weight per token
+      grams   - trigram -> name tokens, to resolve misspelt or truncated tokens
+
+    A house's name score is the IDF-weighted Dice overlap between one of its
+    names and the name tokens recognised in the narration, so a one-word name
+    does not fully match a narration that names someone else as well.
+    Evidence is combined as independent signals (1 - product of (1 - p)), so a
+    name plus a house number outranks either.
+    """
+
+    def __init__(self, houses):
+        """houses: iterable of (house_number, street_code, names)."""
+        self.house_numbers = []
+        self.by_house_key = {}
+        self.by_street = defaultdict(list)
+        self.by_name = defaultdict(set)
+        self.postings = defaultdict(lambda: defaultdict(set))
+        self.name_weights = []
+        self.name_house = []
+        self.grams = defaultdict(set)
+
+        for house_id, (house_number, street_code, names) in enumerate(houses):
+            self.house_numbers.append(house_number)
+            self.by_house_key[house_key(house_number)] = house_id
+            if street_code:
+                self.by_street[house_key(street_code)].append(house_id)
+            for name in names:
+                if not name:
+                    continue
+                self.by_name[normalize_name(name)].add(house_id)
+                tokens = set(name_tokens(name))
+                if not tokens:
+                    continue
+                name_id = len(self.name_house)
+                self.name_house.append(house_id)
+                self.name_weights.append(tokens)
+                for token in tokens:
+                    self.postings[token][house_id].add(name_id)
+
+        num_houses = max(len(self.house_numbers), 1)
+        self.idf = {
+            token: math.log(1 + num_houses / len(houses_with_token))
+            for token, houses_with_token in self.postings.items()
+        }
+        # Total token weight of each name, the denominator of its score
+        self.name_weights = [sum(self.idf[token] for token in tokens) for tokens in self.name_weights]
+        self.token_grams = {}
+        for token in self.postings:
+            self.token_grams[token] = token_trigrams(token)
+            for gram in self.token_grams[token]:
+                self.grams[gram].add(token)
+
+        self.resolve_token = lru_cache(maxsize=65536)(self._resolve_token)
+
+    @classmethod
+    def from_houses(cls, houses):
+        """Matcher over a {house_number: House} map."""
+        return cls(
+            (house.house_number, house.street_code, [house.primary_name] + house.aliases)
+            for house in houses.values()
+        )
+
+    @classmethod
+    def from_records(cls, records):
+        """Matcher over house dicts in the import JSON shape."""
+        return cls(
+            (record['house_number'], record.get('street_code'),
+             [record.get('primary_name')] + record.get('aliases', []))
+            for record in records
+        )
+
+    def _resolve_token(self, token):
+        """Vocabulary tokens a narration token stands for, as ((token, similarity), ...)."""
+        if token in self.postings:
+            return ((token, 1.0),)
+        if len(token) < FUZZY_MIN_LENGTH or token.isdigit():
+            return ()
+        grams = token_trigrams(token)
+        candidates = set()
+        for gram in grams:
+            candidates.update(self.grams.get(gram, ()))
+        matches = []
+        for candidate in candidates:
+            similarity = jaccard(grams, self.token_grams[candidate])
+            if similarity >= FUZZY_SIMILARITY:
+                matches.append((candidate, similarity))
+        return tuple(sorted(matches, key=lambda match: -match[1])[:3])
+
+    def name_scores(self, tokens):
+        """Best name score per house for a set of narration tokens."""
+        # Each vocabulary token counts once, at the best similarity any narration token reached
+        best = {}
+        for token in tokens:
+            for vocab_token, similarity in self.resolve_token(token):
+                if similarity > best.get(vocab_token, 0.0):
+                    best[vocab_token] = similarity
+
+        matched = defaultdict(float)
+        narration_weight = 0.0
+        for vocab_token, similarity in best.items():
+            weight = self.idf[vocab_token] * similarity
+            narration_weight += weight
+            for name_ids in self.postings[vocab_token].values():
+                for name_id in name_ids:
+                    matched[name_id] += weight
+
+        scores = {}
+        for name_id, weight in matched.items():
+            score = min(2 * weight / (self.name_weights[name_id] + narration_weight), 1.0)
+            house_id = self.name_house[name_id]
+            if score > scores.get(house_id, 0.0):
+                scores[house_id] = score
+        return scores
+
+    def match(self, narration, limit=3):
+        """Ranked candidates for one narration: [{'house_number', 'confidence', 'evidence'}]."""
+        text = normalize_name(narration)
+
+        # Token and trigram name matches, then an exact full-name match on top
+        names = self.name_scores(set(TOKEN_RE.findall(text)))
+        for house_id in self.by_name.get(text, ()):
+            names[house_id] = 1.0
+
+        # House references
+        refs = {}
+        for ref in HOUSE_REF_RE.findall(text):
+            key = house_key(ref)
+            house_id = self.by_house_key.get(key)
+            if house_id is not None:
+                refs[house_id] = ('house_number', HOUSE_REF_CONFIDENCE)
+            else:
+                for house_id in self.by_street.get(key.rstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), ()):
+                    refs.setdefault(house_id, ('street_code', STREET_REF_CONFIDENCE))
+
+        # Combine as independent signals and keep only the best few
+        scored = []
+        for house_id in names.keys() | refs.keys():
+            miss = 1.0 - names.get(house_id, 0.0)
+            if house_id in refs:
+                miss *= 1.0 - refs[house_id][1]
+            if miss <= 1.0 - MIN_CONFIDENCE:
+                scored.append((1.0 - miss, house_id))
+
+        candidates = []
+        for confidence, house_id in heapq.nsmallest(
+                limit, scored, key=lambda item: (-item[0], self.house_numbers[item[1]])):
+            evidence = ['name'] if house_id in names else []
+            if house_id in refs:
+                evidence.append(refs[house_id][0])
+            candidates.append({
+                'house_number': self.house_numbers[house_id],
+                'confidence': round(confidence, 4),
+                'evidence': sorted(evidence)
+            })
+        return candidates
+
+    def match_batch(self, narrations, limit=3):
+        """Ranked candidates for each narration, in order."""
+        return [self.match(narration, limit) for narration in narrations]
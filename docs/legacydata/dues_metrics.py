@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the security dues processor.
+Exclusive per-stage wall times and run counters, written as a metrics JSON
+next to the outputs so slow runs can be traced to a stage.
+"""
+
+import json
+import resource
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class RunMetrics:
+    """Stage timers and counters for one run.
+
+    Stages nest: entering a stage pauses the one it runs inside, so each
+    stage's time excludes its sub-stages and the stage times add up to the
+    timed part of the run. Time spent in generators is charged to whichever
+    stage is open when they run, e.g. a workbook loaded lazily on the first
+    row is charged to workbook_load, then its rows to row_parsing.
+    """
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._open = []
+        self._mark = None
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._open:
+            self.stages[self._open[-1]] += now - self._mark
+        self._open.append(name)
+        self._mark = now
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.stages[self._open.pop()] += now - self._mark
+            self._mark = now
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def merge(self, other):
+        """Add another run's stage times and counters (e.g. from a worker process)."""
+        for name, seconds in other.stages.items():
+            self.stages[name] += seconds
+        for name, value in other.counters.items():
+            self.counters[name] += value
+
+    def __getstate__(self):
+        # Sent back from worker processes once their stages are closed
+        return {'stages': dict(self.stages), 'counters': dict(self.counters)}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.stages.update(state['stages'])
+        self.counters.update(state['counters'])
+
+    def to_json(self):
+        total = sum(self.stages.values())
+        return {
+            'total_seconds': total,
+            'stages': {
+                name: {'seconds': seconds, 'share': seconds / total if total else 0.0}
+                for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1])
+            },
+            'counters': dict(sorted(self.counters.items())),
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        }
+
+    def save(self, path, **metadata):
+        with open(path, 'w') as f:
+            json.dump({**metadata, **self.to_json()}, f, indent=2)
+
+    def report(self):
+        """Lines for the run report, slowest stage first."""
+        data = self.to_json()
+        lines = [f"Timed stages: {data['total_seconds']:.2f}s"]
+        for name, stage in data['stages'].items():
+            lines.append(f"  {name}: {stage['seconds']:.3f}s ({stage['share']:.0%})")
+        return lines
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Estate-wide grouping of near-duplicate resident names.
+Indexes every primary name and alias by character trigrams and groups names
+whose trigram sets overlap enough, without comparing every pair of names.
+"""
+
+import math
+import re
+from collections import defaultdict
+
+from dues_records import normalize_name
+
+# Minimum Jaccard similarity of two names' trigram sets to group them
+NAME_SIMILARITY = 0.6
+
+TOKEN_RE = re.compile(r'[A-Z0-9]+')
+
+def name_trigrams(key):
+    """Trigram set of a normalized name, with word order and punctuation ignored."""
+    text = '#' + '#'.join(sorted(TOKEN_RE.findall(key))) + '#'
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+def jaccard(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+class NameIndex:
+    """Resident names of an estate, grouped by trigram similarity.
+
+    Spellings that normalize to the same key ("GBENGA RAHEEM", "Gbenga  Raheem")
+    share one entry. groups() finds similar keys with prefix filtering: grams
+    are ordered rarest first, and two sets with Jaccard similarity >= threshold
+    must share a gram within the first |x| - ceil(threshold * |x|) + 1 of each,
+    so only names meeting in those short prefixes are ever compared.
+    """
+
+    def __init__(self):
+        self.spellings = defaultdict(set)
+        self.houses = defaultdict(set)
+
+    @classmethod
+    def from_houses(cls, houses):
+        """Index the primary names and aliases of a {house_number: House} map.
+
+        Placeholder primary names given to NO_PRIMARY_NAME houses are skipped.
+        """
+        index = cls()
+        for house in houses.values():
+            if 'NO_PRIMARY_NAME' not in house.flags:
+                index.add(house.primary_name, house.house_number)
+            for name in house.aliases:
+                index.add(name, house.house_number)
+        return index
+
+    def add(self, name, house_number):
+        key = normalize_name(name)
+        if key:
+            self.spellings[key].add(name)
+            self.houses[key].add(house_number)
+
+    def similar_pairs(self, threshold=NAME_SIMILARITY):
+        """Yield (key, key, similarity) for every pair of keys at or above threshold."""
+        keys = list(self.spellings)
+        grams = {key: name_trigrams(key) for key in keys}
+
+        frequency = defaultdict(int)
+        for gram_set in grams.values():
+            for gram in gram_set:
+                frequency[gram] += 1
+
+        postings = defaultdict(list)
+        for key in sorted(keys, key=lambda key: len(grams[key])):
+            gram_set = grams[key]
+            size = len(gram_set)
+            if not size:
+                continue
+            ordered = sorted(gram_set, key=lambda gram: (frequency[gram], gram))
+            prefix = ordered[:size - math.ceil(threshold * size) + 1]
+
+            candidates = set()
+            for gram in prefix:
+                for other in postings[gram]:
+                    # Keys are visited smallest first, so only the lower size bound can fail
+                    if len(grams[other]) >= threshold * size:
+                        candidates.add(other)
+
+            for other in candidates:
+                similarity = jaccard(gram_set, grams[other])
+                if similarity >= threshold:
+                    yield other, key, similarity
+
+            for gram in prefix:
+                postings[gram].append(key)
+
+    def groups(self, threshold=NAME_SIMILARITY):
+        """Groups of similar names, as dicts of names, spellings and houses.
+
+        Only groups worth reviewing are returned: those with more than one
+        spelling or seen in more than one house.
+        """
+        parent = {key: key for key in self.spellings}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for a, b, _ in self.similar_pairs(threshold):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        members = defaultdict(list)
+        for key in self.spellings:
+            members[find(key)].append(key)
+
+        groups = []
+        for keys in members.values():
+            spellings = sorted(set().union(*(self.spellings[key] for key in keys)))
+            houses = sorted(set().union(*(self.houses[key] for key in keys)))
+            if len(spellings) > 1 or len(houses) > 1:
+                groups.append({
+                    'names': sorted(keys),
+                    'spellings': spellings,
+                    'houses': houses
+                })
+        groups.sort(key=lambda group: group['names'][0])
+        return groups
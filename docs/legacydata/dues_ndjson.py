@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON output for security dues imports.
+Writes one compact JSON record per line: a metadata header, each house as soon
+as it is finalized, and a trailer with the totals known only at the end.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard library encoder
+    orjson = None
+
+def encode_record(record):
+    """Encode one record as a UTF-8 JSON line."""
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+class NdjsonHouseWriter:
+    """NDJSON file of house records.
+
+    Line 1 is {"record": "export_metadata", ...}, then one
+    {"record": "house", "house": {...}} line per house, and a final
+    {"record": "export_summary", ...} line with the house count and the span
+    of years written.
+
+    Records go to a .partial file next to path, which close() renames into
+    place; discard() (or leaving the with block on an exception) removes it,
+    so a failed run never leaves a truncated file that looks like an import.
+    """
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.total_houses = 0
+        self.start_year = None
+        self.end_year = None
+        self._partial_path = path.with_name(path.name + '.partial')
+        self._file = open(self._partial_path, 'wb')
+        self._file.write(encode_record({'record': 'export_metadata', 'export_metadata': metadata}))
+
+    def write_house(self, house):
+        """Write a finalized House record."""
+        self._file.write(encode_record({'record': 'house', 'house': house.to_dict()}))
+        self.total_houses += 1
+        if house.num_years:
+            first, last = min(house.year_numbers), max(house.year_numbers)
+            self.start_year = first if self.start_year is None else min(self.start_year, first)
+            self.end_year = last if self.end_year is None else max(self.end_year, last)
+
+    def close(self):
+        """Write the trailer record and move the file into place."""
+        self._file.write(encode_record({
+            'record': 'export_summary',
+            'total_houses': self.total_houses,
+            'data_period': {'start_year': self.start_year, 'end_year': self.end_year}
+        }))
+        self._file.close()
+        os.replace(self._partial_path, self.path)
+
+    def discard(self):
+        """Close and remove the partial file without writing a trailer."""
+        self._file.close()
+        self._partial_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+def read_ndjson(path):
+    """Yield the records of an NDJSON file."""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line) if orjson is not None else json.loads(line)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Occupancy calendars for security dues houses.
+Move-in and move-out highlights are collected as month bitmasks while house
+blocks are parsed. A house's occupied and chargeable months across all its
+years are then single integers, so chargeable months per year, expected dues
+and vacancy gaps come from bit operations.
+"""
+
+MONTHS_PER_YEAR = 12
+
+# Bit 0 of every calendar mask is January of this year
+EPOCH_YEAR = 2000
+
+YEAR_MASK = (1 << MONTHS_PER_YEAR) - 1
+
+# Months after the move-in month that are not charged (the move-in month itself is not charged either)
+FREE_MONTHS_AFTER_MOVE_IN = 1
+
+# Calendar events, in the order they apply within one month
+MOVE_OUT, RESUME, MOVE_IN = range(3)
+
+def month_index(year, month):
+    """Calendar bit of a month (1-12) of a year."""
+    return (year - EPOCH_YEAR) * MONTHS_PER_YEAR + month - 1
+
+def month_key(index):
+    """'YYYY-MM' for a calendar bit."""
+    return f"{EPOCH_YEAR + index // MONTHS_PER_YEAR}-{index % MONTHS_PER_YEAR + 1:02d}"
+
+def row_mask(year, month_bits):
+    """Place a year row's 12-bit month mask (bit 0 = Jan) in the calendar; years before the epoch are dropped."""
+    if year < EPOCH_YEAR:
+        return 0
+    return month_bits << month_index(year, 1)
+
+def span_mask(first, last):
+    """Bits first..last inclusive."""
+    return ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+
+def iter_bits(mask):
+    """Indices of the set bits, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def iter_runs(mask):
+    """(first, last) index of each run of consecutive set bits, lowest first."""
+    while mask:
+        first = (mask & -mask).bit_length() - 1
+        shifted = mask >> first
+        # Lowest clear bit of the shifted mask ends the run
+        length = ((shifted + 1) & ~shifted).bit_length() - 1
+        yield first, first + length - 1
+        mask &= ~span_mask(first, first + length - 1)
+
+class OccupancyCalendar:
+    """Occupied and chargeable months of one house, as calendar bitmasks.
+
+    Events are swept in month order. A house is occupied from the start of
+    its first year unless its first event is a move-in; a move-out ends
+    occupancy after that month and the next move-in starts it again. The
+    move-in month and FREE_MONTHS_AFTER_MOVE_IN months after it are occupied
+    but not charged. A resume (a later row showing a resident without a
+    move-in highlight) also ends a vacancy left by a move-out, with no free
+    months, so one red cell cannot leave every later year of the house
+    uncharged. Only the span
+    of years the house has rows for is covered; rows before EPOCH_YEAR are
+    charged in full.
+    """
+
+    __slots__ = ('occupied', 'chargeable', 'span')
+
+    def __init__(self, occupied, chargeable, span):
+        self.occupied = occupied
+        self.chargeable = chargeable
+        self.span = span
+
+    @classmethod
+    def from_events(cls, move_ins, move_outs, first_year, last_year, resumes=0):
+        """Build the calendar from move-in, move-out and resume month masks over first_year..last_year."""
+        start = month_index(max(first_year, EPOCH_YEAR), 1)
+        end = month_index(max(last_year, EPOCH_YEAR), MONTHS_PER_YEAR)
+
+        # Within a month the old resident leaves first, then a resume, then a move-in
+        events = sorted([(index, MOVE_OUT) for index in iter_bits(move_outs)] +
+                        [(index, RESUME) for index in iter_bits(resumes)] +
+                        [(index, MOVE_IN) for index in iter_bits(move_ins)])
+        first_move = next((event for _, event in events if event != RESUME), None)
+        occupied_from = None if first_move == MOVE_IN else start
+        moved_out = False
+        occupied = free = 0
+        for index, event in events:
+            if event == MOVE_OUT:
+                if occupied_from is not None:
+                    occupied |= span_mask(occupied_from, index)
+                    occupied_from = None
+                    moved_out = True
+            elif occupied_from is None and (event == MOVE_IN or moved_out):
+                occupied_from = index
+                moved_out = False
+                if event == MOVE_IN:
+                    free |= span_mask(index, index + FREE_MONTHS_AFTER_MOVE_IN)
+        if occupied_from is not None and occupied_from <= end:
+            occupied |= span_mask(occupied_from, end)
+
+        span = span_mask(start, end)
+        occupied &= span
+        return cls(occupied, occupied & ~free, span)
+
+    def chargeable_bits(self, year):
+        """12-bit mask (bit 0 = Jan) of the chargeable months in a year."""
+        if year < EPOCH_YEAR:
+            return YEAR_MASK
+        return (self.chargeable >> month_index(year, 1)) & YEAR_MASK
+
+    def chargeable_months(self, year):
+        """Number of chargeable months in a year."""
+        return self.chargeable_bits(year).bit_count()
+
+    @property
+    def charge_start_month(self):
+        """'YYYY-MM' of the first chargeable month, or None if no month is chargeable."""
+        if not self.chargeable:
+            return None
+        return month_key((self.chargeable & -self.chargeable).bit_length() - 1)
+
+    def vacancy_gaps(self):
+        """Unoccupied stretches of the covered years, as [('YYYY-MM', 'YYYY-MM')] from and to months."""
+        return [(month_key(first), month_key(last)) for first, last in iter_runs(self.span & ~self.occupied)]
+
+def next_month(key):
+    """'YYYY-MM' of the month after key."""
+    year, month = map(int, key.split('-'))
+    return month_key(month_index(year, month) + 1)
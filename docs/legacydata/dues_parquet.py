@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet export of security dues imports for analysis.
+Writes a long monthly payments table, partitioned by year, and a house
+dimension table, built column by column straight from the House arrays.
+"""
+
+import shutil
+
+from dues_records import FIRST_MONTH, MONTH_NAMES, RATE, VALUES_PER_YEAR
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for --parquet
+    pa = None
+
+# Highlight of a payment month, from the blue/red cells of its year row
+HIGHLIGHT_MOVE_IN = 'move_in'
+HIGHLIGHT_MOVE_OUT = 'move_out'
+
+def payment_columns(houses):
+    """Monthly payments in long format: one row per house, year row and month."""
+    columns = {name: [] for name in (
+        'house_number', 'street_code', 'row_index', 'year', 'month', 'rate', 'amount', 'highlight'
+    )}
+    months = list(range(1, len(MONTH_NAMES) + 1))
+
+    for house in houses:
+        values = house.year_values
+        for i, year in enumerate(house.year_numbers):
+            base = i * VALUES_PER_YEAR
+            move_ins, move_outs = house.year_move_ins[i], house.year_move_outs[i]
+            highlights = [
+                HIGHLIGHT_MOVE_IN if move_ins >> m & 1 else HIGHLIGHT_MOVE_OUT if move_outs >> m & 1 else None
+                for m in range(len(MONTH_NAMES))
+            ]
+
+            columns['house_number'].extend([house.house_number] * len(months))
+            columns['street_code'].extend([house.street_code] * len(months))
+            columns['row_index'].extend([i] * len(months))
+            columns['year'].extend([year] * len(months))
+            columns['month'].extend(months)
+            columns['rate'].extend([values[base + RATE]] * len(months))
+            columns['amount'].extend(values[base + FIRST_MONTH:base + FIRST_MONTH + len(MONTH_NAMES)])
+            columns['highlight'].extend(highlights)
+
+    return columns
+
+def house_columns(houses):
+    """House dimension: one row per house with its names, status and totals."""
+    columns = {name: [] for name in (
+        'house_number', 'street_code', 'primary_name', 'aliases', 'status', 'move_in_month',
+        'move_out_month', 'property_type', 'rate_tier', 'flags', 'flagged', 'num_years',
+        'total_expected', 'total_paid', 'net_position'
+    )}
+    for house in houses:
+        summary = house.summary or {}
+        columns['house_number'].append(house.house_number)
+        columns['street_code'].append(house.street_code)
+        columns['primary_name'].append(house.primary_name)
+        columns['aliases'].append(list(house.aliases))
+        columns['status'].append(house.status)
+        columns['move_in_month'].append(house.move_in_month)
+        columns['move_out_month'].append(house.move_out_month)
+        columns['property_type'].append(house.property_type)
+        columns['rate_tier'].append(house.rate_tier)
+        columns['flags'].append(list(house.flags))
+        columns['flagged'].append(bool(house.flags))
+        columns['num_years'].append(house.num_years)
+        columns['total_expected'].append(summary.get('total_expected', 0.0))
+        columns['total_paid'].append(summary.get('total_paid', 0.0))
+        columns['net_position'].append(summary.get('net_position', 0.0))
+    return columns
+
+def payments_schema():
+    return pa.schema([
+        ('house_number', pa.dictionary(pa.int32(), pa.string())),
+        ('street_code', pa.dictionary(pa.int32(), pa.string())),
+        ('row_index', pa.int16()),
+        ('year', pa.int16()),
+        ('month', pa.int8()),
+        ('rate', pa.float64()),
+        ('amount', pa.float64()),
+        ('highlight', pa.dictionary(pa.int8(), pa.string()))
+    ])
+
+def houses_schema():
+    return pa.schema([
+        ('house_number', pa.string()),
+        ('street_code', pa.string()),
+        ('primary_name', pa.string()),
+        ('aliases', pa.list_(pa.string())),
+        ('status', pa.dictionary(pa.int8(), pa.string())),
+        ('move_in_month', pa.string()),
+        ('move_out_month', pa.string()),
+        ('property_type', pa.dictionary(pa.int8(), pa.string())),
+        ('rate_tier', pa.dictionary(pa.int8(), pa.string())),
+        ('flags', pa.list_(pa.string())),
+        ('flagged', pa.bool_()),
+        ('num_years', pa.int16()),
+        ('total_expected', pa.float64()),
+        ('total_paid', pa.float64()),
+        ('net_position', pa.float64())
+    ])
+
+def export_parquet(houses, output_dir):
+    """Write payments/year=YYYY/*.parquet and houses.parquet under output_dir.
+
+    Readers such as pyarrow.dataset, pandas and DuckDB read the year
+    directories as a partition column, so a filter on year only opens the
+    matching files and a column selection only reads those column chunks.
+    The payments directory is replaced on every export.
+    Returns the number of payment rows and house rows written.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export needs the pyarrow package")
+
+    houses = list(houses)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    payments_dir = output_dir / 'payments'
+    shutil.rmtree(payments_dir, ignore_errors=True)
+    payments = pa.Table.from_pydict(payment_columns(houses), schema=payments_schema())
+    ds.write_dataset(
+        payments, payments_dir, format='parquet',
+        partitioning=ds.partitioning(pa.schema([('year', pa.int16())]), flavor='hive')
+    )
+
+    house_table = pa.Table.from_pydict(house_columns(houses), schema=houses_schema())
+    pq.write_table(house_table, output_dir / 'houses.parquet')
+
+    return payments.num_rows, house_table.num_rows
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Compact record types for parsed security dues data.
+Houses keep their year rows in flat numeric arrays instead of nested dicts, and
+serialize back to the JSON shape the importer already reads.
+"""
+
+from array import array
+from functools import lru_cache
+
+from dues_occupancy import YEAR_MASK, OccupancyCalendar, next_month
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Layout of one year row in House.year_values
+RATE = 0
+PAID = 1
+FIRST_MONTH = 2
+VALUES_PER_YEAR = FIRST_MONTH + len(MONTH_NAMES)
+
+# Year-level flags, stored as bits in House.year_flags
+YEAR_FLAGS = ('SUM_MISMATCH',)
+
+def flag_bit(flag):
+    """Bit for a year-level flag name."""
+    return 1 << YEAR_FLAGS.index(flag)
+
+@lru_cache(maxsize=4096)
+def normalize_name(name):
+    """Comparison key for a resident name: upper case with runs of whitespace collapsed."""
+    return ' '.join(name.upper().split()) if name else ''
+
+class MonthlyPayments(array):
+    """Twelve monthly amounts, Jan-Dec, in a fixed-size float array."""
+
+    __slots__ = ()
+
+    def __new__(cls, amounts=None):
+        if amounts is None:
+            amounts = [0.0] * len(MONTH_NAMES)
+        return super().__new__(cls, 'd', amounts)
+
+    def to_dict(self):
+        return dict(zip(MONTH_NAMES, self))
+
+class YearRecord:
+    """View of one year row stored in a House's arrays.
+
+    expected is rate times the year's chargeable months (from the house's
+    occupancy calendar) and year_balance is expected - paid; both are derived
+    on access rather than stored.
+    """
+
+    __slots__ = ('house', 'index')
+
+    def __init__(self, house, index):
+        self.house = house
+        self.index = index
+
+    def _value(self, offset):
+        return self.house.year_values[self.index * VALUES_PER_YEAR + offset]
+
+    @property
+    def year(self):
+        return self.house.year_numbers[self.index]
+
+    @property
+    def rate(self):
+        return self._value(RATE)
+
+    @property
+    def paid(self):
+        return self._value(PAID)
+
+    @property
+    def payments(self):
+        start = self.index * VALUES_PER_YEAR + FIRST_MONTH
+        return MonthlyPayments(self.house.year_values[start:start + len(MONTH_NAMES)])
+
+    @property
+    def chargeable_months(self):
+        return self.house.chargeable_months(self.year)
+
+    @property
+    def expected(self):
+        return self.rate * self.chargeable_months
+
+    @property
+    def year_balance(self):
+        return self.expected - self.paid
+
+    @property
+    def flags(self):
+        bits = self.house.year_flags[self.index]
+        return [flag for i, flag in enumerate(YEAR_FLAGS) if bits & (1 << i)]
+
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'rate': self.rate,
+            'payments': self.payments.to_dict(),
+            'paid': self.paid,
+            'chargeable_months': self.chargeable_months,
+            'expected': self.expected,
+            'year_balance': self.year_balance,
+            'flags': self.flags
+        }
+
+class House:
+    """A house block with its residents, occupancy and year rows.
+
+    aliases keeps the spellings in first-seen order; alias_keys holds their
+    normalized forms for constant-time duplicate checks.
+
+    Year rows live in parallel arrays: year_numbers, year_values
+    (VALUES_PER_YEAR floats per year: rate, paid, Jan-Dec), year_flags (a
+    bitmask of YEAR_FLAGS per year) and year_move_ins/year_move_outs (the
+    row's own blue and red month cells, 12-bit masks with bit 0 = Jan).
+
+    move_in_bits and move_out_bits collect every highlighted move-in and
+    move-out month as dues_occupancy calendar bits, and resume_bits the
+    January of every year row that shows a resident (payments or a name)
+    without a move highlight; build_calendar() turns them into the
+    OccupancyCalendar that decides chargeable months. Until then every
+    year is charged in full. ledger is the house's dues_ledger.HouseLedger once
+    the house is finalized.
+    """
+
+    __slots__ = (
+        'house_number', 'street_code', 'primary_name', 'aliases', 'alias_keys', 'move_in_month',
+        'move_out_month', 'status', 'year_numbers', 'year_values', 'year_flags', 'year_move_ins',
+        'year_move_outs', 'flags', 'property_type', 'rate_tier', 'summary', 'move_in_bits',
+        'move_out_bits', 'resume_bits', 'calendar', 'ledger'
+    )
+
+    def __init__(self, house_number, street_code):
+        self.house_number = house_number
+        self.street_code = street_code
+        self.primary_name = None
+        self.aliases = []
+        self.alias_keys = set()
+        self.move_in_month = None
+        self.move_out_month = None
+        self.status = 'ACTIVE'
+        self.year_numbers = array('i')
+        self.year_values = array('d')
+        self.year_flags = array('B')
+        self.year_move_ins = array('H')
+        self.year_move_outs = array('H')
+        self.flags = []
+        self.property_type = 'residential'
+        self.rate_tier = None
+        self.summary = None
+        self.move_in_bits = 0
+        self.move_out_bits = 0
+        self.resume_bits = 0
+        self.calendar = None
+        self.ledger = None
+
+    @property
+    def num_years(self):
+        return len(self.year_numbers)
+
+    @property
+    def years(self):
+        return [YearRecord(self, i) for i in range(len(self.year_numbers))]
+
+    def build_calendar(self):
+        """Build the occupancy calendar over the years this house has rows for."""
+        if self.year_numbers:
+            self.calendar = OccupancyCalendar.from_events(
+                self.move_in_bits, self.move_out_bits, min(self.year_numbers), max(self.year_numbers),
+                self.resume_bits)
+        return self.calendar
+
+    def chargeable_bits(self, year):
+        """12-bit mask (bit 0 = Jan) of the months of a year the resident is charged for."""
+        if self.calendar is None:
+            return YEAR_MASK
+        return self.calendar.chargeable_bits(year)
+
+    def chargeable_months(self, year):
+        """Months of a year the resident is charged for."""
+        return self.chargeable_bits(year).bit_count()
+
+    def add_alias(self, name):
+        """Add an alias unless it matches the primary name or a known alias after normalize_name()."""
+        key = normalize_name(name)
+        if key in self.alias_keys or key == normalize_name(self.primary_name):
+            return False
+        self.alias_keys.add(key)
+        self.aliases.append(name)
+        return True
+
+    def add_year(self, year, rate, paid, payments, move_ins=0, move_outs=0):
+        """Append a year row."""
+        self.year_numbers.append(year)
+        self.year_values.append(rate)
+        self.year_values.append(paid)
+        self.year_values.extend(payments)
+        self.year_flags.append(0)
+        self.year_move_ins.append(move_ins)
+        self.year_move_outs.append(move_outs)
+
+    def extend_years(self, year_numbers, year_values, move_ins=None, move_outs=None):
+        """Append year rows already packed in the year_numbers/year_values/year_move_* layout."""
+        self.year_numbers.extend(year_numbers)
+        self.year_values.extend(year_values)
+        self.year_flags.extend(bytes(len(year_numbers)))
+        self.year_move_ins.extend(move_ins if move_ins is not None else [0] * len(year_numbers))
+        self.year_move_outs.extend(move_outs if move_outs is not None else [0] * len(year_numbers))
+
+    def to_dict(self):
+        """The house in the import JSON shape."""
+        data = {
+            'house_number': self.house_number,
+            'street_code': self.street_code,
+            'primary_name': self.primary_name,
+            'aliases': list(self.aliases),
+            'move_in_month': self.move_in_month,
+            'move_in_free_month': next_month(self.move_in_month) if self.move_in_month else None,
+            'charge_start_month': self.calendar.charge_start_month if self.calendar is not None else None,
+            'move_out_month': self.move_out_month,
+            'status': self.status,
+            'vacancy_gaps': [list(gap) for gap in self.calendar.vacancy_gaps()] if self.calendar is not None else [],
+            'years': [year.to_dict() for year in self.years],
+            'flags': list(self.flags),
+            'property_type': self.property_type,
+            'rate_tier': self.rate_tier
+        }
+        if self.summary is not None:
+            data['summary'] = dict(self.summary)
+        return data
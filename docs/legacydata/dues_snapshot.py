@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Binary snapshots of the raw cell grid of tracker sheets.
+The values and highlight classes a reader extracted from a sheet are stored in
+typed arrays in one file per sheet, keyed by the workbook's content hash. A
+rerun on an unchanged workbook memory-maps the snapshot and decodes rows with
+NumPy instead of opening the workbook.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b'DUESNAP1'
+SNAPSHOT_VERSION = 1
+
+# Snapshots kept per directory; older ones (edited workbooks) are removed
+MAX_SNAPSHOTS = 8
+
+# Cell type codes. Numbers share one 8-byte slot per cell: float bits, int,
+# bool, or an index into the string table for strings and date/time values.
+T_NONE, T_FLOAT, T_INT, T_BOOL, T_STR, T_DATETIME, T_DATE, T_TIME, T_TIMEDELTA = range(9)
+
+# Sections in file order: (name, dtype); integers are little-endian
+SECTIONS = (
+    ('row_numbers', np.dtype('<i8')),
+    ('types', np.dtype('u1')),
+    ('numbers', np.dtype('<i8')),
+    ('highlights', np.dtype('u1')),
+    ('string_offsets', np.dtype('<i8')),
+    ('string_data', np.dtype('u1'))
+)
+
+def encode_timedelta(value):
+    return f"{value.days},{value.seconds},{value.microseconds}"
+
+def decode_timedelta(text):
+    days, seconds, microseconds = map(int, text.split(','))
+    return timedelta(days=days, seconds=seconds, microseconds=microseconds)
+
+# Date/time values are stored as text in the string table
+TEXT_CODECS = {
+    T_DATETIME: (datetime, datetime.isoformat, datetime.fromisoformat),
+    T_DATE: (date, date.isoformat, date.fromisoformat),
+    T_TIME: (time, time.isoformat, time.fromisoformat),
+    T_TIMEDELTA: (timedelta, encode_timedelta, decode_timedelta)
+}
+
+class SnapshotUnsupported(ValueError):
+    """A cell value has no snapshot encoding; the sheet is read from the workbook as usual."""
+
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+class SnapshotWriter:
+    """Write a snapshot one row at a time.
+
+    The fixed-width sections of each row are spooled to temporary files as
+    rows arrive, so only the distinct strings and highlight names are held in
+    memory; close() assembles the snapshot file and replaces path atomically.
+    """
+
+    def __init__(self, path, num_cols):
+        self.path = path
+        self.num_cols = num_cols
+        self.num_rows = 0
+        self.strings = {}
+        self.highlight_names = {None: 0}
+        self.spools = {name: tempfile.TemporaryFile(dir=path.parent)
+                       for name in ('row_numbers', 'types', 'numbers', 'highlights')}
+
+    def string_id(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def add_row(self, row_idx, values, highlights):
+        """Encode one (row_idx, values, highlights) row; rows shorter than num_cols are padded with empty cells."""
+        num_cols = self.num_cols
+        types = bytearray(num_cols)
+        numbers = bytearray(8 * num_cols)
+        for c, value in enumerate(values[:num_cols]):
+            if value is None:
+                continue
+            # bool before int: bool is an int subclass
+            if isinstance(value, bool):
+                types[c] = T_BOOL
+                struct.pack_into('<q', numbers, 8 * c, int(value))
+            elif isinstance(value, int):
+                if not INT64_MIN <= value <= INT64_MAX:
+                    raise SnapshotUnsupported(f"Cannot snapshot integer {value} in row {row_idx}")
+                types[c] = T_INT
+                struct.pack_into('<q', numbers, 8 * c, value)
+            elif isinstance(value, float):
+                types[c] = T_FLOAT
+                struct.pack_into('<d', numbers, 8 * c, value)
+            elif isinstance(value, str):
+                types[c] = T_STR
+                struct.pack_into('<q', numbers, 8 * c, self.string_id(value))
+            else:
+                # datetime before date: datetime is a date subclass
+                for code in (T_DATETIME, T_DATE, T_TIME, T_TIMEDELTA):
+                    value_type, encode, _ = TEXT_CODECS[code]
+                    if isinstance(value, value_type):
+                        types[c] = code
+                        struct.pack_into('<q', numbers, 8 * c, self.string_id(encode(value)))
+                        break
+                else:
+                    raise SnapshotUnsupported(f"Cannot snapshot {type(value).__name__} value in row {row_idx}")
+
+        highlight_codes = bytearray(num_cols)
+        for c, highlight in enumerate(highlights[:num_cols]):
+            code = self.highlight_names.get(highlight)
+            if code is None:
+                if len(self.highlight_names) > 255:
+                    raise SnapshotUnsupported(f"Too many highlight classes in row {row_idx}")
+                code = self.highlight_names[highlight] = len(self.highlight_names)
+            highlight_codes[c] = code
+
+        self.spools['row_numbers'].write(struct.pack('<q', row_idx))
+        self.spools['types'].write(types)
+        self.spools['numbers'].write(numbers)
+        self.spools['highlights'].write(highlight_codes)
+        self.num_rows += 1
+
+    def close(self):
+        """Write the snapshot file from the spooled sections."""
+        encoded = [text.encode('utf-8') for text in self.strings]
+        string_offsets = [0]
+        for data in encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+        sections = {name: spool for name, spool in self.spools.items()}
+        sections['string_offsets'] = struct.pack(f'<{len(string_offsets)}q', *string_offsets)
+        sections['string_data'] = b''.join(encoded)
+
+        def size(name):
+            data = sections[name]
+            return len(data) if isinstance(data, bytes) else data.seek(0, os.SEEK_END)
+
+        header = {'version': SNAPSHOT_VERSION, 'rows': self.num_rows, 'cols': self.num_cols,
+                  'highlights': list(self.highlight_names), 'sections': {}}
+        # Sections start on 8-byte boundaries after the header
+        offset = 0
+        for name, _ in SECTIONS:
+            header['sections'][name] = [offset, size(name)]
+            offset += -(-size(name) // 8) * 8
+        header_bytes = json.dumps(header).encode('utf-8')
+        header_bytes += b' ' * (-(len(SNAPSHOT_MAGIC) + 4 + len(header_bytes)) % 8)
+
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+            for name, _ in SECTIONS:
+                data = sections[name]
+                if isinstance(data, bytes):
+                    f.write(data)
+                else:
+                    data.seek(0)
+                    shutil.copyfileobj(data, f)
+                f.write(b'\0' * (-size(name) % 8))
+        os.replace(tmp_path, self.path)
+        self.discard()
+
+    def discard(self):
+        """Drop the spooled sections without writing a snapshot."""
+        for spool in self.spools.values():
+            spool.close()
+
+class Snapshot:
+    """A memory-mapped snapshot file, read as NumPy views of its sections."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        header_size, = struct.unpack_from('<I', self._map, len(SNAPSHOT_MAGIC))
+        base = len(SNAPSHOT_MAGIC) + 4
+        header = json.loads(self._map[base:base + header_size])
+        if header['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {header['version']}")
+        base += header_size
+
+        self.num_rows = header['rows']
+        self.num_cols = header['cols']
+        sections = {}
+        for name, dtype in SECTIONS:
+            offset, size = header['sections'][name]
+            sections[name] = np.frombuffer(self._map, dtype=dtype, count=size // np.dtype(dtype).itemsize,
+                                           offset=base + offset)
+        shape = (self.num_rows, self.num_cols)
+        self.row_numbers = sections['row_numbers']
+        self.types = sections['types'].reshape(shape)
+        self.numbers = sections['numbers'].reshape(shape)
+        self.highlight_codes = sections['highlights'].reshape(shape)
+        self.highlight_names = np.array(header['highlights'] + [None], dtype=object)[:-1]
+
+        offsets = sections['string_offsets'].tolist()
+        data = sections['string_data'].tobytes()
+        strings = [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+        self.strings = np.array(strings + [None], dtype=object)[:-1]
+
+    def decode(self, start, stop, max_col):
+        """Values and highlights of rows start:stop, as lists of Python objects."""
+        types = self.types[start:stop, :max_col]
+        numbers = self.numbers[start:stop, :max_col]
+        values = np.full(types.shape, None, dtype=object)
+
+        mask = types == T_FLOAT
+        values[mask] = numbers[mask].view('<f8').astype(object)
+        mask = types == T_INT
+        values[mask] = numbers[mask].astype(object)
+        mask = types == T_BOOL
+        values[mask] = (numbers[mask] != 0).astype(object)
+        mask = types == T_STR
+        values[mask] = self.strings[numbers[mask]]
+        for code, (_, _, decode) in TEXT_CODECS.items():
+            mask = types == code
+            if mask.any():
+                values[mask] = np.array([decode(text) for text in self.strings[numbers[mask]]] + [None],
+                                        dtype=object)[:-1]
+
+        highlights = self.highlight_names[self.highlight_codes[start:stop, :max_col]]
+        return values.tolist(), highlights.tolist()
+
+    def iter_rows(self, min_row=1, max_col=None, max_row=None):
+        """Yield (row_idx, values, highlights) like the workbook readers, from min_row to max_row."""
+        start = int(np.searchsorted(self.row_numbers, min_row))
+        stop = int(np.searchsorted(self.row_numbers, max_row, side='right')) if max_row else self.num_rows
+        values, highlights = self.decode(start, stop, max_col or self.num_cols)
+        yield from zip(self.row_numbers[start:stop].tolist(), values, highlights)
+
+class SnapshotStore:
+    """Snapshots of one workbook's sheets in a directory.
+
+    Files are named by the workbook fingerprint, the reader engine and the
+    sheet, so an edited workbook never reads a stale snapshot. The store is
+    picklable and can be handed to worker processes.
+    """
+
+    def __init__(self, directory, fingerprint):
+        self.directory = directory
+        self.fingerprint = fingerprint
+
+    def path(self, engine, sheet=None):
+        sheet_key = hashlib.blake2b((sheet or '').encode('utf-8'), digest_size=6).hexdigest()
+        return self.directory / f"{self.fingerprint}-{engine}-{sheet_key}.snap"
+
+    def open(self, engine, sheet=None):
+        """The snapshot of a sheet (default: the active one), or None if there is none."""
+        try:
+            return Snapshot(self.path(engine, sheet))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def recording(self, raw_rows, engine, sheet, num_cols):
+        """Pass rows through, writing them as the sheet's snapshot once all have been read.
+
+        Rows are spooled to disk as they pass, so a streaming read stays
+        streaming. A row with a value that has no encoding drops the snapshot
+        and the rest of the rows pass through unrecorded.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(engine, sheet)
+        writer = SnapshotWriter(path, num_cols)
+        try:
+            for row in raw_rows:
+                if writer is not None:
+                    try:
+                        writer.add_row(*row)
+                    except SnapshotUnsupported as e:
+                        print(f"  No snapshot written: {e}")
+                        writer.discard()
+                        writer = None
+                yield row
+        except BaseException:
+            # Not read to the end (or failed): no snapshot
+            if writer is not None:
+                writer.discard()
+            raise
+        if writer is not None:
+            writer.close()
+            print(f"  Snapshot written: {path.name} ({writer.num_rows} rows)")
+            self.prune()
+
+    def prune(self):
+        """Drop the oldest snapshots beyond MAX_SNAPSHOTS."""
+        snapshots = sorted(self.directory.glob('*.snap'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in snapshots[MAX_SNAPSHOTS:]:
+            old.unlink()
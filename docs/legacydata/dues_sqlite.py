@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+SQLite staging database for reviewing security dues imports.
+Holds every processed house in normalized tables (houses, years, monthly
+payments, flags) with indexes for review queries, plus a resolutions table
+that reviewers fill in and that is kept from one run to the next.
+"""
+
+import json
+import sqlite3
+
+from dues_records import FIRST_MONTH, MONTH_NAMES, PAID, RATE, VALUES_PER_YEAR, YearRecord
+
+# Rebuilt on every run
+DATA_TABLES = {
+    'houses': """
+        CREATE TABLE houses (
+            house_number TEXT PRIMARY KEY,
+            street_code TEXT,
+            primary_name TEXT NOT NULL,
+            aliases TEXT NOT NULL,
+            status TEXT NOT NULL,
+            move_in_month TEXT,
+            move_out_month TEXT,
+            property_type TEXT,
+            rate_tier TEXT,
+            flagged INTEGER NOT NULL,
+            total_expected REAL NOT NULL,
+            total_paid REAL NOT NULL,
+            net_position REAL NOT NULL
+        )""",
+    'years': """
+        CREATE TABLE years (
+            house_number TEXT NOT NULL,
+            row_index INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            rate REAL NOT NULL,
+            paid REAL NOT NULL,
+            chargeable_months INTEGER NOT NULL,
+            expected REAL NOT NULL,
+            year_balance REAL NOT NULL,
+            PRIMARY KEY (house_number, row_index)
+        )""",
+    'monthly_payments': """
+        CREATE TABLE monthly_payments (
+            house_number TEXT NOT NULL,
+            row_index INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (house_number, row_index, month)
+        )""",
+    'flags': """
+        CREATE TABLE flags (
+            house_number TEXT NOT NULL,
+            flag TEXT NOT NULL,
+            year INTEGER,
+            row_index INTEGER
+        )"""
+}
+
+# Created after the bulk insert, which is faster than maintaining them row by row
+INDEXES = (
+    "CREATE INDEX idx_houses_street_code ON houses (street_code)",
+    "CREATE INDEX idx_houses_flagged ON houses (flagged)",
+    "CREATE INDEX idx_years_year ON years (year)",
+    "CREATE INDEX idx_monthly_payments_year ON monthly_payments (year, month)",
+    "CREATE INDEX idx_flags_house_number ON flags (house_number)",
+    "CREATE INDEX idx_flags_flag ON flags (flag)",
+    "CREATE INDEX idx_flags_year ON flags (year)"
+)
+
+# Kept across runs; reviewers record one resolution per house and flag
+RESOLUTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS resolutions (
+        house_number TEXT NOT NULL,
+        flag TEXT NOT NULL,
+        resolution TEXT NOT NULL,
+        note TEXT,
+        resolved_by TEXT,
+        resolved_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (house_number, flag)
+    )"""
+
+OPEN_FLAGS_VIEW = """
+    CREATE VIEW open_flags AS
+    SELECT f.* FROM flags AS f
+    LEFT JOIN resolutions AS r ON r.house_number = f.house_number AND r.flag = f.flag
+    WHERE r.resolution IS NULL"""
+
+def staging_rows(houses):
+    """Rows for each data table, as {table: [tuple]}, from finalized House objects."""
+    rows = {name: [] for name in DATA_TABLES}
+    num_months = len(MONTH_NAMES)
+
+    for house in houses:
+        summary = house.summary or {}
+        rows['houses'].append((
+            house.house_number, house.street_code, house.primary_name, json.dumps(house.aliases),
+            house.status, house.move_in_month, house.move_out_month, house.property_type,
+            house.rate_tier, int(bool(house.flags)), summary.get('total_expected', 0.0),
+            summary.get('total_paid', 0.0), summary.get('net_position', 0.0)
+        ))
+        for flag in house.flags:
+            rows['flags'].append((house.house_number, flag, None, None))
+
+        values = house.year_values
+        for i, year in enumerate(house.year_numbers):
+            base = i * VALUES_PER_YEAR
+            rate = values[base + RATE]
+            paid = values[base + PAID]
+            chargeable_months = house.chargeable_months(year)
+            expected = rate * chargeable_months
+            rows['years'].append((house.house_number, i, year, rate, paid, chargeable_months, expected,
+                                  expected - paid))
+            for month in range(num_months):
+                amount = values[base + FIRST_MONTH + month]
+                if amount:
+                    rows['monthly_payments'].append((house.house_number, i, year, month + 1, amount))
+            if house.year_flags[i]:
+                for flag in YearRecord(house, i).flags:
+                    rows['flags'].append((house.house_number, flag, year, i))
+
+    return rows
+
+def read_resolutions(path):
+    """Reviewer resolutions in a staging database, as {(house_number, flag): resolution}."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return {}
+    try:
+        return {
+            (house_number, flag): resolution
+            for house_number, flag, resolution in conn.execute(
+                "SELECT house_number, flag, resolution FROM resolutions")
+        }
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+def write_staging_db(houses, path):
+    """Rebuild the data tables of the staging database in one transaction.
+
+    The resolutions table is left in place, so decisions recorded by reviewers
+    carry over and open_flags lists only the flags still to review. Returns
+    the row count of each table and the number of open flags.
+    """
+    rows = staging_rows(houses)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("BEGIN")
+        conn.execute("DROP VIEW IF EXISTS open_flags")
+        for name, ddl in DATA_TABLES.items():
+            conn.execute(f"DROP TABLE IF EXISTS {name}")
+            conn.execute(ddl)
+            if rows[name]:
+                placeholders = ', '.join('?' * len(rows[name][0]))
+                conn.executemany(f"INSERT INTO {name} VALUES ({placeholders})", rows[name])
+        for ddl in INDEXES:
+            conn.execute(ddl)
+        conn.execute(RESOLUTIONS_TABLE)
+        conn.execute(OPEN_FLAGS_VIEW)
+        conn.execute("COMMIT")
+
+        counts = {name: len(table_rows) for name, table_rows in rows.items()}
+        counts['open_flags'] = conn.execute("SELECT COUNT(*) FROM open_flags").fetchone()[0]
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return counts
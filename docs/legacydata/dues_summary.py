@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Running totals for the security dues export summary.
+Updated once per house as it is finalized, with the financial totals and rate
+history taken from the PaymentTensor, so the summary report needs no further
+passes over the house map. Run directly (or as `dues_cli.py summarize`) to
+print the report of an earlier run from its JSON outputs.
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+class SummaryAccumulator:
+    """Estate statistics, financial totals, data period and rate history.
+
+    add() is called once per finalized house and add_tensor() once with the
+    run's PaymentTensor, which supplies the financial totals and rate
+    history; every field of the summary report is then available without
+    rescanning the houses. Clean houses also get their own year span for the
+    main import metadata.
+    """
+
+    def __init__(self):
+        self.total_houses = 0
+        self.clean_records = 0
+        self.flagged_records = 0
+        self.total_residents = 0
+        self.active_houses = 0
+        self.inactive_houses = 0
+
+        self.total_expected = 0.0
+        self.total_paid = 0.0
+        self.total_debt = 0.0
+        self.total_credit = 0.0
+
+        self.years = set()
+        self.rates = {}
+        self.clean_start_year = None
+        self.clean_end_year = None
+        self.flags = defaultdict(int)
+
+    def add(self, house, flagged):
+        """Fold one finalized house into the counts and year span."""
+        self.total_houses += 1
+        self.total_residents += 1 + len(house.aliases)
+        if house.status == 'ACTIVE':
+            self.active_houses += 1
+        elif house.status == 'INACTIVE':
+            self.inactive_houses += 1
+
+        year_numbers = house.year_numbers
+        self.years.update(year_numbers)
+
+        if flagged:
+            self.flagged_records += 1
+            for flag in house.flags:
+                self.flags[flag] += 1
+        else:
+            self.clean_records += 1
+            if year_numbers:
+                first, last = min(year_numbers), max(year_numbers)
+                if self.clean_start_year is None or first < self.clean_start_year:
+                    self.clean_start_year = first
+                if self.clean_end_year is None or last > self.clean_end_year:
+                    self.clean_end_year = last
+
+    def add_tensor(self, tensor):
+        """Take the estate financial totals and rate history from the run's PaymentTensor."""
+        financial = tensor.financial_summary()
+        self.total_expected = financial['total_expected']
+        self.total_paid = financial['total_paid']
+        self.total_debt = financial['total_debt']
+        self.total_credit = financial['total_credit']
+        self.rates = tensor.rate_history()
+
+    @property
+    def net_position(self):
+        return self.total_paid - self.total_expected
+
+    @property
+    def start_year(self):
+        return min(self.years) if self.years else None
+
+    @property
+    def end_year(self):
+        return max(self.years) if self.years else None
+
+    def rate_history(self):
+        """Distinct rates charged in each year, as {year: sorted rates}."""
+        return dict(sorted(self.rates.items()))
+
+def print_report(summary):
+    """Print the processing summary section of the run report."""
+    print("\n" + "="*60)
+    print("PROCESSING SUMMARY")
+    print("="*60)
+    print(f"\nTotal Houses Processed: {summary['statistics']['total_houses']}")
+    print(f"  Clean Records: {summary['statistics']['clean_records']}")
+    print(f"  Flagged Records: {summary['statistics']['flagged_records']}")
+    print(f"  Total Residents: {summary['statistics']['total_residents']}")
+    print(f"\nStatus:")
+    print(f"  Active: {summary['statistics']['active_houses']}")
+    print(f"  Inactive: {summary['statistics']['inactive_houses']}")
+    print(f"\nFinancial Summary (NGN):")
+    print(f"  Total Expected: ₦{summary['financial_summary']['total_expected']:,.2f}")
+    print(f"  Total Paid: ₦{summary['financial_summary']['total_paid']:,.2f}")
+    print(f"  Total Debt: ₦{summary['financial_summary']['total_debt']:,.2f}")
+    print(f"  Total Credit: ₦{summary['financial_summary']['total_credit']:,.2f}")
+    print(f"  Net Position: ₦{summary['financial_summary']['net_position']:,.2f} ({summary['financial_summary']['net_position_type']})")
+    print(f"\nData Period: {summary['data_period']['start_year']} - {summary['data_period']['end_year']}")
+    print(f"Years Covered: {summary['data_period']['years_covered']}")
+
+def main(argv=None):
+    base_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description='Print the summary report of an earlier processing run.')
+    parser.add_argument('output_dir', nargs='?', type=Path, default=base_dir / 'importdata',
+                        help='Directory holding the run outputs (default: importdata next to this script)')
+    args = parser.parse_args(argv)
+
+    summary_file = args.output_dir / 'security_dues_export_summary.json'
+    if not summary_file.exists():
+        parser.error(f"no summary in {args.output_dir}; run the process command first")
+    with open(summary_file) as f:
+        summary = json.load(f)
+
+    print(f"Source: {summary['export_metadata']['source_file']} "
+          f"(exported {summary['export_metadata']['export_date']})")
+    print_report(summary)
+
+    # Stage times, when the run wrote metrics
+    metrics_file = args.output_dir / 'security_dues_metrics.json'
+    if metrics_file.exists():
+        with open(metrics_file) as f:
+            metrics = json.load(f)
+        print(f"\nTimed stages: {metrics['total_seconds']:.2f}s")
+        for name, stage in metrics['stages'].items():
+            print(f"  {name}: {stage['seconds']:.3f}s ({stage['share']:.0%})")
+
+    if summary['flags_breakdown']:
+        print(f"\nFlags Breakdown:")
+        for flag, count in sorted(summary['flags_breakdown'].items()):
+            print(f"  {flag}: {count}")
+
+    print("\n" + "="*60)
+
+if __name__ == '__main__':
+    main()
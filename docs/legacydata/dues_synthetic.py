@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Synthetic legacy dues trackers for benchmarks.
+Writes workbooks laid out like the v2 tracker: title rows, the header row,
+then one block per house with yellow primary names, alias rows, blue move-in
+and red move-out months, repeated header rows and malformed currency cells.
+"""
+
+import argparse
+import random
+from pathlib import Path
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+from dues_layout import V2_LAYOUT
+from dues_records import MONTH_NAMES
+
+YELLOW_FILL = PatternFill('solid', fgColor='FFFFFF00')
+BLUE_FILL = PatternFill('solid', fgColor='FF0070C0')
+RED_FILL = PatternFill('solid', fgColor='FFFF0000')
+
+HEADER = ["HOUSE NO'S", 'STATUS', 'NAMES OF RESIDENT', 'CONTACTS', 'YEAR', '(RATE)'] + \
+    MONTH_NAMES + ['PAID', 'DUE DEBT']
+
+FIRST_NAMES = ('EMEKA', 'CONSTANCE', 'KINGSLEY', 'OLUWASEUN', 'AMAKA', 'TUNDE', 'CHIOMA', 'IBRAHIM',
+               'FUNMI', 'OSAHON', 'NGOZI', 'SEGUN', 'HALIMA', 'CHINEDU', 'BOLA', 'YUSUF')
+SURNAMES = ('ABARA', 'OKAFOR', 'ADEYEMI', 'BELLO', 'EZE', 'OGUNLEYE', 'NWOSU', 'ABUBAKAR',
+            'OKONKWO', 'ADEBAYO', 'OSA', 'IMAEKE', 'ONYEMA', 'LAWAL', 'OBI', 'ADEGOKE')
+TITLES = ('', '', '', 'MR ', 'MRS ', 'DR ', 'CHIEF ', '(PASTOR) ')
+STREET_SUFFIXES = ('', '', '', ' A', ' B', ' F-1', ' F-2')
+
+RATES = (3000, 5000, 7000, 10000)
+
+# Month cells written as text the way the legacy sheets sometimes have them
+MALFORMED_AMOUNTS = ('₦{:,}', '{:,}', ' {} ', 'N/A', '-', '{:,}.00')
+
+def random_name(rng):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+    return f"{rng.choice(TITLES)}{name}".strip() if rng.random() < 0.3 else name
+
+def malformed(rng, amount):
+    text = rng.choice(MALFORMED_AMOUNTS)
+    return text.format(int(amount)) if '{' in text else text
+
+def tracker_rows(num_houses, num_years, rng, end_year=2025, alias_rate=0.4, malformed_rate=0.01,
+                 mismatch_rate=0.005, header_every=25):
+    """Yield the rows of a tracker sheet as lists of (value, fill) cells."""
+    title = [('OPERA ESTATE SECURITY DUES TRACKER', None)]
+    for row in range(1, V2_LAYOUT.header_row):
+        yield title if row == 1 else []
+    header = [(value, None) for value in HEADER]
+    yield header
+
+    years = list(range(end_year, end_year - num_years, -1))
+    for h in range(num_houses):
+        if h and h % header_every == 0:
+            yield []
+            yield header
+
+        house_number = h + 1 if rng.random() < 0.7 else f"{h + 1}{rng.choice(STREET_SUFFIXES)}"
+        names = [random_name(rng)]
+        while rng.random() < alias_rate and len(names) < 4:
+            names.append(random_name(rng))
+
+        # A move-in in some year's month; a few houses also move out
+        move_in = (rng.randrange(num_years), rng.randrange(12)) if rng.random() < 0.2 else None
+        move_out = (rng.randrange(num_years), rng.randrange(12)) if rng.random() < 0.05 else None
+        rate = rng.choice(RATES)
+        block_paid = 0
+        block_debt = 0
+
+        for i, year in enumerate(years):
+            if i == 0 or rng.random() < 0.2:
+                rate = rng.choice(RATES)
+            row = [(None, None)] * len(HEADER)
+            row[0] = (house_number if i == 0 else None, None)
+            row[1] = ('LANDLORD' if rng.random() < 0.1 else None, None)
+            if i < len(names):
+                # Primary name in yellow on the first row, aliases below it
+                row[2] = (names[i], YELLOW_FILL if i == 0 else None)
+            row[4] = (year, None)
+            row[5] = (rate, None)
+
+            paid = 0
+            for month in range(12):
+                amount = rate * rng.choice((0, 1, 1, 1, 2)) if rng.random() < 0.6 else 0
+                fill = None
+                if move_in == (i, month):
+                    fill = BLUE_FILL
+                elif move_out == (i, month):
+                    fill = RED_FILL
+                if amount and rng.random() < malformed_rate:
+                    value = malformed(rng, amount)
+                else:
+                    value = amount or None
+                row[6 + month] = (value, fill)
+                paid += amount
+
+            if rng.random() < mismatch_rate:
+                paid += rate
+            row[18] = (paid, None)
+            row[19] = (rate * 12 - paid, None)
+            block_paid += paid
+            block_debt += rate * 12 - paid
+            yield row
+
+        # Block totals and a spacer row, as in the real tracker
+        yield [(None, None)] * 18 + [(block_paid, None), (block_debt, None)]
+        yield []
+
+def generate_tracker(path, num_houses, num_years, seed=1, **options):
+    """Write a synthetic tracker workbook. Returns the number of rows written."""
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('ALL STREET IN OPERA')
+
+    num_rows = 0
+    for row in tracker_rows(num_houses, num_years, rng, **options):
+        cells = []
+        for value, fill in row:
+            cell = WriteOnlyCell(ws, value=value)
+            if fill is not None:
+                cell.fill = fill
+            cells.append(cell)
+        ws.append(cells)
+        num_rows += 1
+
+    wb.save(path)
+    return num_rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic legacy dues tracker.')
+    parser.add_argument('output_file', type=Path)
+    parser.add_argument('--houses', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    num_rows = generate_tracker(args.output_file, args.houses, args.years, args.seed)
+    print(f"Wrote {args.output_file}: {args.houses} houses x {args.years} years, {num_rows} rows")
+
+if __name__ == '__main__':
+    main()
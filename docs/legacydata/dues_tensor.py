@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Dense NumPy views of parsed security dues data.
+Packs the year records of a house map into arrays so cross-validation, expected
+amounts, balances and financial totals run as batched array operations.
+"""
+
+import numpy as np
+
+from dues_records import FIRST_MONTH, PAID, RATE, VALUES_PER_YEAR
+
+MONTHS_PER_YEAR = 12
+
+class PaymentTensor:
+    """Year records of a house map packed into NumPy arrays.
+
+    Record-level arrays hold one entry per year record, in house then row
+    order: amounts (records x 12), rate, paid and the chargeable months
+    (records x 12 booleans), plus the house and year index of each record. A
+    house can carry several records for the same year (a new resident block,
+    a repeated tab), so the dense houses x years views sum the records that
+    land in the same cell.
+    """
+
+    def __init__(self, house_numbers, years, house_idx, year_idx, amounts, rate, paid, chargeable_mask=None):
+        self.house_numbers = house_numbers
+        self.years = years
+        self.house_idx = house_idx
+        self.year_idx = year_idx
+        self.amounts = amounts
+        self.rate = rate
+        self.paid = paid
+        if chargeable_mask is None:
+            chargeable_mask = np.ones(amounts.shape, dtype=bool)
+        self.chargeable_mask = chargeable_mask
+        self.chargeable = chargeable_mask.sum(axis=1).astype(np.float64)
+
+    @classmethod
+    def from_houses(cls, houses):
+        """Pack the year rows of a {house_number: House} map.
+
+        Each House already stores its rows as flat float arrays, so packing is a
+        buffer copy per house rather than a walk over every month cell.
+        """
+        house_numbers = list(houses)
+        counts = np.fromiter((house.num_years for house in houses.values()),
+                             dtype=np.intp, count=len(house_numbers))
+        record_years = np.fromiter(
+            (year for house in houses.values() for year in house.year_numbers), dtype=np.int64)
+        values = np.frombuffer(
+            b''.join(house.year_values.tobytes() for house in houses.values()), dtype=np.float64
+        ).reshape(-1, VALUES_PER_YEAR)
+
+        # Chargeable months per record, from each house's occupancy calendar
+        chargeable_bits = np.fromiter(
+            (house.chargeable_bits(year) for house in houses.values() for year in house.year_numbers),
+            dtype=np.int64, count=len(record_years))
+        chargeable_mask = (chargeable_bits[:, None] >> np.arange(MONTHS_PER_YEAR)) & 1 == 1
+
+        years, year_idx = np.unique(record_years, return_inverse=True)
+
+        return cls(
+            house_numbers,
+            years,
+            np.repeat(np.arange(len(house_numbers), dtype=np.intp), counts),
+            year_idx.astype(np.intp),
+            values[:, FIRST_MONTH:],
+            values[:, RATE],
+            values[:, PAID],
+            chargeable_mask
+        )
+
+    @property
+    def num_houses(self):
+        return len(self.house_numbers)
+
+    @property
+    def record_years(self):
+        return self.years[self.year_idx]
+
+    # Record-level computations
+
+    def monthly_sum(self):
+        """Sum of the 12 month cells of each record."""
+        return self.amounts.sum(axis=1)
+
+    def sum_mismatch(self, threshold=100):
+        """Records whose month cells disagree with the PAID column by more than threshold."""
+        return np.abs(self.monthly_sum() - self.paid) > threshold
+
+    def expected(self):
+        """Expected dues per record: rate times chargeable months (12 for a full year)."""
+        return self.rate * self.chargeable
+
+    def monthly_charges(self):
+        """records x 12 dues charged per month: the rate in each chargeable month."""
+        return self.rate[:, None] * self.chargeable_mask
+
+    # Dense houses x years views
+
+    def dense(self, values):
+        """Scatter a record-level array into a houses x years (x ...) array, summing duplicates."""
+        out = np.zeros((self.num_houses, len(self.years)) + values.shape[1:], dtype=np.float64)
+        np.add.at(out, (self.house_idx, self.year_idx), values)
+        return out
+
+    def dense_paid(self):
+        """houses x years PAID totals."""
+        return self.dense(self.paid)
+
+    def dense_expected(self):
+        """houses x years expected dues."""
+        return self.dense(self.expected())
+
+    # House-level computations
+
+    def house_totals(self):
+        """(total_expected, total_paid, net_position) arrays, one entry per house."""
+        total_expected = self.dense_expected().sum(axis=1)
+        total_paid = self.dense_paid().sum(axis=1)
+        return total_expected, total_paid, total_paid - total_expected
+
+    # Estate-level summaries
+
+    def financial_summary(self):
+        """Estate totals: expected, paid, debt, credit and net position."""
+        total_expected, total_paid, net_position = self.house_totals()
+        estate_expected = float(total_expected.sum())
+        estate_paid = float(total_paid.sum())
+        return {
+            'total_expected': estate_expected,
+            'total_paid': estate_paid,
+            'total_debt': float(-net_position[net_position < 0].sum()),
+            'total_credit': float(net_position[net_position > 0].sum()),
+            'net_position': estate_paid - estate_expected
+        }
+
+    def rate_history(self):
+        """Distinct rates charged in each year, as {year: sorted rates}."""
+        pairs = np.unique(np.stack([self.record_years.astype(np.float64), self.rate], axis=1), axis=0)
+        history = {}
+        for year, rate in pairs:
+            history.setdefault(int(year), []).append(float(rate))
+        return history
@@ -1,33 +1,57 @@
 #!/usr/bin/env python3
 """Find where the actual data starts."""
 
-import openpyxl
-
-file_path = '/home/feyijimiohioma/projects/Residio/docs/legacydata/ResidioTest.xlsx'
-
-print("Loading workbook...")
-wb = openpyxl.load_workbook(file_path, data_only=True)
-ws = wb.active
-
-print(f"Searching for header row...")
-for i in range(1, min(50, ws.max_row + 1)):
-    row = ws[i]
-    first_val = str(row[0].value).upper() if row[0].value else ""
-
-    if 'HOUSE' in first_val and 'NO' in first_val:
-        print(f"\nFound header at row {i}")
-        print("Header row:")
-        for j, cell in enumerate(row[:19], 1):
-            print(f"  Col {j}: {cell.value}")
-
-        print(f"\nFirst data row (row {i+1}):")
-        next_row = ws[i+1]
-        for j, cell in enumerate(next_row[:19], 1):
-            print(f"  Col {j}: {cell.value}")
-        break
-
-print(f"\nChecking rows 15-25:")
-for i in range(15, 26):
-    row = ws[i]
-    values = [str(cell.value)[:20] if cell.value else '' for cell in row[:5]]
-    print(f"Row {i}: {values}")
+import argparse
+from pathlib import Path
+
+from dues_layout import HEADER_SCAN_COLS, HEADER_SCAN_ROWS, is_header_row
+
+def main(argv=None):
+    base_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description='Find the header row where tracker data starts.')
+    parser.add_argument('file_path', nargs='?', type=Path, default=base_dir / 'ResidioTest.xlsx',
+                        help='Workbook to search (default: ResidioTest.xlsx next to this script)')
+    parser.add_argument('--sheet', help='Sheet name (default: the active sheet)')
+    parser.add_argument('--max-rows', type=int, default=HEADER_SCAN_ROWS,
+                        help=f'Rows to search for the header (default: {HEADER_SCAN_ROWS})')
+    args = parser.parse_args(argv)
+
+    import openpyxl
+
+    print("Loading workbook...")
+    wb = openpyxl.load_workbook(args.file_path, data_only=True, read_only=True)
+    ws = wb[args.sheet] if args.sheet else wb.active
+
+    print(f"Searching for header row...")
+    rows = list(ws.iter_rows(max_row=args.max_rows + 1, max_col=HEADER_SCAN_COLS, values_only=True))
+    header_idx = None
+    for i, row in enumerate(rows[:args.max_rows], 1):
+        # Same rule the processor uses to find a sheet's layout
+        if row and is_header_row(row):
+            header_idx = i
+            print(f"\nFound header at row {i}")
+            print("Header row:")
+            for j, value in enumerate(row, 1):
+                print(f"  Col {j}: {value}")
+
+            if i < len(rows):
+                print(f"\nFirst data row (row {i+1}):")
+                for j, value in enumerate(rows[i], 1):
+                    print(f"  Col {j}: {value}")
+            break
+
+    if header_idx is None:
+        wb.close()
+        parser.error(f"no HOUSE NO header row in the first {args.max_rows} rows of sheet {ws.title!r}")
+
+    # Rows around the header, to check the layout by eye
+    start = max(1, header_idx - 5)
+    print(f"\nChecking rows {start}-{start + 10}:")
+    for i, row in enumerate(ws.iter_rows(min_row=start, max_row=start + 10, max_col=5, values_only=True), start):
+        values = [str(value)[:20] if value else '' for value in row]
+        print(f"Row {i}: {values}")
+    wb.close()
+
+if __name__ == '__main__':
+    main()
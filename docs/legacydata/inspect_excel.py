@@ -1,26 +1,39 @@
 #!/usr/bin/env python3
 """Quick inspection of the Excel file structure."""
 
-import openpyxl
+import argparse
+from pathlib import Path
 
-file_path = '/home/feyijimiohioma/projects/Residio/docs/legacydata/ResidioTest.xlsx'
+def main(argv=None):
+    base_dir = Path(__file__).parent
 
-print("Loading workbook...")
-wb = openpyxl.load_workbook(file_path, data_only=True)
-ws = wb.active
+    parser = argparse.ArgumentParser(description='Show the size and first rows of a workbook.')
+    parser.add_argument('file_path', nargs='?', type=Path, default=base_dir / 'ResidioTest.xlsx',
+                        help='Workbook to inspect (default: ResidioTest.xlsx next to this script)')
+    parser.add_argument('--sheet', help='Sheet name (default: the active sheet)')
+    parser.add_argument('--rows', type=int, default=10, help='Leading rows to show (default: 10)')
+    parser.add_argument('--sample-row', type=int, default=5, help='Row to show column by column (default: 5)')
+    args = parser.parse_args(argv)
 
-print(f"Sheet name: {ws.title}")
-print(f"Max row: {ws.max_row}")
-print(f"Max column: {ws.max_column}")
+    import openpyxl
 
-print("\nFirst 10 rows:")
-for i in range(1, min(11, ws.max_row + 1)):
-    row = ws[i]
-    values = [cell.value for cell in row[:19]]
-    print(f"Row {i}: {values[:5]}...")  # Show first 5 columns
+    print("Loading workbook...")
+    wb = openpyxl.load_workbook(args.file_path, data_only=True)
+    ws = wb[args.sheet] if args.sheet else wb.active
 
-print("\nSample row values (Row 5):")
-if ws.max_row >= 5:
-    row = ws[5]
-    for i, cell in enumerate(row[:19], 1):
-        print(f"  Col {i}: {cell.value}")
+    print(f"Sheet name: {ws.title}")
+    print(f"Max row: {ws.max_row}")
+    print(f"Max column: {ws.max_column}")
+
+    print(f"\nFirst {args.rows} rows:")
+    for i, values in enumerate(ws.iter_rows(max_row=args.rows, max_col=19, values_only=True), 1):
+        print(f"Row {i}: {list(values[:5])}...")  # Show first 5 columns
+
+    print(f"\nSample row values (Row {args.sample_row}):")
+    if ws.max_row >= args.sample_row:
+        row = next(ws.iter_rows(min_row=args.sample_row, max_row=args.sample_row, max_col=19, values_only=True))
+        for i, value in enumerate(row, 1):
+            print(f"  Col {i}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Bank Statement Processor for Residio
+Extracts transactions from First Bank PDF statements page by page in a worker
+pool, checks them against the running balance and writes normalized records.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from pypdf import PdfReader  # AES-encrypted statements also need the cryptography package
+
+from dues_matcher import HouseMatcher
+from dues_ndjson import encode_record, read_ndjson
+
+# Table columns and the header text that marks them
+COLUMN_HEADERS = {
+    'TransDate': 'trans_date',
+    'Reference': 'reference',
+    'Transaction Details': 'narration',
+    'ValueDate': 'value_date',
+    'Deposit': 'credit',
+    'Withdrawal': 'debit',
+    'Balance': 'balance'
+}
+
+# Header x positions on First Bank statements, used until a header row is seen
+DEFAULT_COLUMNS = {
+    'trans_date': 61, 'reference': 108, 'narration': 164, 'value_date': 316,
+    'credit': 391, 'debit': 436, 'balance': 517
+}
+
+# Statement summary labels on the first page
+SUMMARY_LABELS = {
+    'Account No:': 'account_number',
+    'For the Period of:': 'period',
+    'Opening Balance:': 'opening_balance',
+    'Closing Balance:': 'closing_balance',
+    'Total Credit': 'total_credit',
+    'Total Debit': 'total_debit'
+}
+SUMMARY_AMOUNTS = ('opening_balance', 'closing_balance', 'total_credit', 'total_debit')
+
+DATE_RE = re.compile(r'^\d{2}-[A-Z]{3}-\d{2}$')
+AMOUNT_RE = re.compile(r'^\d[\d,]*\.\d{2}$')
+
+# Text items within this many points vertically are on the same line
+LINE_TOLERANCE = 2
+
+# A narration line continues the row above only if it is this close to it
+CONTINUATION_GAP = 14
+
+# Pages handed to a worker per task
+PAGES_PER_TASK = 8
+
+# Tasks submitted but not yet consumed, per worker
+TASKS_IN_FLIGHT_PER_WORKER = 2
+
+# Transactions held back and matched to houses together
+MATCH_BATCH_SIZE = 1000
+
+def parse_amount(text):
+    """Parse a statement amount such as '10,516,375.16'."""
+    return float(text.replace(',', ''))
+
+def to_kobo(amount):
+    """Amount in whole kobo, for exact balance arithmetic."""
+    return round(amount * 100)
+
+def parse_date(text):
+    """Convert a statement date ('03-NOV-25') to ISO format."""
+    return datetime.strptime(text, '%d-%b-%y').date().isoformat()
+
+def open_statement(file_path, password=None):
+    """Open a statement PDF, decrypting it if needed."""
+    reader = PdfReader(file_path)
+    if reader.is_encrypted:
+        if not password or not reader.decrypt(password):
+            raise ValueError(f"{file_path} is password-protected; pass the correct --password")
+    return reader
+
+def page_lines(page):
+    """Text items of a page grouped into lines, top to bottom.
+
+    Each line is a list of (x, text) sorted left to right, paired with its y.
+    """
+    items = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        text = text.strip()
+        if text:
+            items.append((tm[5], tm[4], text))
+
+    page.extract_text(visitor_text=visit)
+    items.sort(key=lambda item: (-item[0], item[1]))
+
+    lines = []
+    for y, x, text in items:
+        if lines and abs(lines[-1][0] - y) <= LINE_TOLERANCE:
+            lines[-1][1].append((x, text))
+        else:
+            lines.append((y, [(x, text)]))
+    return [(y, sorted(line)) for y, line in lines]
+
+def header_columns(line):
+    """Column x positions if a line is the table header, else None."""
+    found = {COLUMN_HEADERS[text]: x for x, text in line if text in COLUMN_HEADERS}
+    if len(found) == len(COLUMN_HEADERS):
+        return found
+    return None
+
+def assign_columns(line, columns):
+    """Map each text item of a line to its nearest column (amounts are right-aligned)."""
+    cells = {}
+    for x, text in line:
+        column = min(columns, key=lambda name: abs(columns[name] - x))
+        cells.setdefault(column, []).append(text)
+    return cells
+
+def parse_statement_summary(lines):
+    """Account number, period and totals printed above the table on the first page."""
+    summary = {}
+    for _, line in lines:
+        for (_, label), (_, value) in zip(line, line[1:]):
+            key = SUMMARY_LABELS.get(label)
+            if key and key not in summary:
+                summary[key] = parse_amount(value) if key in SUMMARY_AMOUNTS else value
+    return summary
+
+def parse_page(page, page_number, columns):
+    """Extract the transaction rows of one page.
+
+    Returns (rows, continuation, brought_forward, columns): rows are dicts in
+    page order; continuation holds narration lines at the top of the table
+    that finish the last row of the previous page; brought_forward is the
+    Balance B/F amount if the page has one; columns are the header positions
+    in effect at the end of the page.
+    """
+    rows = []
+    continuation = []
+    brought_forward = None
+    current = None
+    last_y = None
+    in_table = False
+
+    for y, line in page_lines(page):
+        found = header_columns(line)
+        if found:
+            columns = found
+            in_table = True
+            current = None
+            last_y = y
+            continue
+        if not in_table:
+            continue
+
+        cells = assign_columns(line, columns)
+        trans_date = cells.get('trans_date', [''])[0]
+
+        if DATE_RE.match(trans_date):
+            amounts = {
+                column: parse_amount(cells[column][0])
+                for column in ('credit', 'debit', 'balance')
+                if column in cells and AMOUNT_RE.match(cells[column][0])
+            }
+            current = {
+                'trans_date': parse_date(trans_date),
+                'value_date': parse_date(cells['value_date'][0]) if 'value_date' in cells else None,
+                'reference': ' '.join(cells.get('reference', [])) or None,
+                'narration': ' '.join(cells.get('narration', [])),
+                'credit': amounts.get('credit', 0.0),
+                'debit': amounts.get('debit', 0.0),
+                'balance': amounts.get('balance'),
+                'page': page_number
+            }
+            rows.append(current)
+            last_y = y
+            continue
+
+        narration = ' '.join(cells.get('narration', []))
+        if narration.startswith('Balance B/F') and 'balance' in cells:
+            brought_forward = parse_amount(cells['balance'][0])
+            last_y = y
+            continue
+
+        # Wrapped narration continues the row above; anything further away ends the table
+        if last_y is None or last_y - y > CONTINUATION_GAP or set(cells) - {'reference', 'narration'}:
+            in_table = False
+            continue
+        if current is None:
+            continuation.append(narration)
+        else:
+            current['narration'] = f"{current['narration']} {narration}".strip()
+        last_y = y
+
+    return rows, continuation, brought_forward, columns
+
+# The statement opened by this worker process (see open_worker_statement)
+_worker_reader = None
+
+def open_worker_statement(file_path, password):
+    """Pool initializer: open and decrypt the statement once per worker process."""
+    global _worker_reader
+    _worker_reader = open_statement(file_path, password)
+
+def parse_pages(page_numbers, columns):
+    """Parse a run of pages in a worker process, from the worker's open statement."""
+    results = []
+    for page_number in page_numbers:
+        rows, continuation, brought_forward, columns = parse_page(
+            _worker_reader.pages[page_number - 1], page_number, columns)
+        results.append((rows, continuation, brought_forward))
+    return results
+
+def iter_page_results(file_path, password, num_pages, columns, workers=None):
+    """Yield (rows, continuation, brought_forward) per page, in page order.
+
+    Pages are split into tasks of PAGES_PER_TASK and parsed in a process pool
+    whose workers each open the statement once. At most
+    TASKS_IN_FLIGHT_PER_WORKER tasks per worker are submitted ahead of the one
+    being consumed, and the next is submitted as each result is taken, so a
+    slow consumer holds a bounded number of parsed pages rather than the
+    whole statement.
+    """
+    tasks = [
+        list(range(start, min(start + PAGES_PER_TASK, num_pages + 1)))
+        for start in range(1, num_pages + 1, PAGES_PER_TASK)
+    ]
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    window = workers * TASKS_IN_FLIGHT_PER_WORKER
+    print(f"Parsing {num_pages} pages in {len(tasks)} tasks with {workers} worker processes...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=open_worker_statement,
+                             initargs=(file_path, password)) as pool:
+        pending = deque()
+        task_iter = iter(tasks)
+        for page_numbers in islice(task_iter, window):
+            pending.append(pool.submit(parse_pages, page_numbers, columns))
+        while pending:
+            results = pending.popleft().result()
+            for page_numbers in islice(task_iter, 1):
+                pending.append(pool.submit(parse_pages, page_numbers, columns))
+            yield from results
+
+def iter_transactions(page_results, opening_balance=None):
+    """Join page rows into transactions and check each against the running balance.
+
+    A row's balance must equal the previous balance plus its deposit minus its
+    withdrawal; rows that do not get a BALANCE_MISMATCH flag. Each transaction
+    is yielded once the next row (or the end) shows its narration is complete.
+    """
+    balance = opening_balance
+    pending = None
+
+    for rows, continuation, brought_forward in page_results:
+        if continuation and pending is not None:
+            pending['narration'] = ' '.join([pending['narration']] + continuation).strip()
+        if brought_forward is not None and balance is None:
+            balance = brought_forward
+
+        for row in rows:
+            if pending is not None:
+                yield pending
+
+            row['flags'] = []
+            if row['balance'] is None:
+                row['flags'].append('NO_BALANCE')
+            elif balance is not None and to_kobo(balance) + to_kobo(row['credit']) - to_kobo(row['debit']) \
+                    != to_kobo(row['balance']):
+                row['flags'].append('BALANCE_MISMATCH')
+            if row['balance'] is not None:
+                balance = row['balance']
+            pending = row
+
+    if pending is not None:
+        yield pending
+
+def load_matcher(import_files):
+    """House matcher over the houses of security dues import files (.json or .ndjson)."""
+    records = []
+    for path in import_files:
+        if Path(path).suffix == '.ndjson':
+            records.extend(record['house'] for record in read_ndjson(path) if record['record'] == 'house')
+        else:
+            with open(path) as f:
+                records.extend(json.load(f)['houses'])
+    return HouseMatcher.from_records(records)
+
+def match_deposits(transactions, matcher):
+    """Attach ranked house_candidates to the deposits in a batch of transactions."""
+    deposits = [transaction for transaction in transactions if transaction['credit']]
+    for transaction, candidates in zip(deposits, matcher.match_batch(t['narration'] for t in deposits)):
+        transaction['house_candidates'] = candidates
+
+def process_statement(file_path, output_file, password=None, workers=None, matcher=None):
+    """Extract, check and write the transactions of a statement. Returns the run summary.
+
+    With a matcher, deposits are matched to houses in batches of MATCH_BATCH_SIZE
+    before they are written.
+    """
+
+    print(f"Loading statement: {file_path}")
+    reader = open_statement(file_path, password)
+    num_pages = len(reader.pages)
+
+    # The first page carries the statement totals and the table header
+    first_lines = page_lines(reader.pages[0])
+    statement = parse_statement_summary(first_lines)
+    columns = next((found for _, line in first_lines if (found := header_columns(line))), DEFAULT_COLUMNS)
+
+    start_time = time.perf_counter()
+
+    counts = {'transactions': 0, 'credits': 0, 'debits': 0, 'balance_mismatches': 0, 'flagged': 0}
+    if matcher is not None:
+        counts['matched_deposits'] = 0
+    total_credit = 0
+    total_debit = 0
+    closing_balance = None
+    first_date = None
+    last_date = None
+
+    def flush(batch):
+        if matcher is not None:
+            match_deposits(batch, matcher)
+            counts['matched_deposits'] += sum(1 for transaction in batch if transaction.get('house_candidates'))
+        f.write(b''.join(encode_record(transaction) for transaction in batch))
+        batch.clear()
+
+    page_results = iter_page_results(file_path, password, num_pages, columns, workers)
+    batch = []
+    with open(output_file, 'wb') as f:
+        for transaction in iter_transactions(page_results, statement.get('opening_balance')):
+            batch.append(transaction)
+            if len(batch) >= MATCH_BATCH_SIZE:
+                flush(batch)
+
+            counts['transactions'] += 1
+            if transaction['credit']:
+                counts['credits'] += 1
+                total_credit += to_kobo(transaction['credit'])
+            if transaction['debit']:
+                counts['debits'] += 1
+                total_debit += to_kobo(transaction['debit'])
+            if 'BALANCE_MISMATCH' in transaction['flags']:
+                counts['balance_mismatches'] += 1
+            if transaction['flags']:
+                counts['flagged'] += 1
+            if transaction['balance'] is not None:
+                closing_balance = transaction['balance']
+            first_date = first_date or transaction['trans_date']
+            last_date = transaction['trans_date']
+        flush(batch)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Extracted {counts['transactions']} transactions from {num_pages} pages in {elapsed:.2f}s "
+          f"({num_pages / elapsed if elapsed else 0:,.1f} pages/sec)")
+
+    # Statement totals printed on the first page against the extracted rows
+    checks = {}
+    for key, extracted in (('total_credit', total_credit / 100), ('total_debit', total_debit / 100),
+                           ('closing_balance', closing_balance)):
+        if key in statement and extracted is not None:
+            checks[key] = {
+                'statement': statement[key],
+                'extracted': extracted,
+                'matches': to_kobo(statement[key]) == to_kobo(extracted)
+            }
+
+    return {
+        'export_metadata': {
+            'export_date': datetime.now().isoformat(),
+            'source_file': Path(file_path).name,
+            'processor': 'Bank Statement Processor for Residio'
+        },
+        'statement': statement,
+        'statistics': {**counts, 'pages': num_pages},
+        'data_period': {'start_date': first_date, 'end_date': last_date},
+        'totals_check': checks
+    }
+
+def main():
+    """Main processing function."""
+
+    base_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description='Extract transactions from a First Bank PDF statement.')
+    parser.add_argument('input_file', nargs='?', type=Path, default=base_dir / '69_0212202545812579_1589769.pdf',
+                        help='Statement PDF (default: the sample statement next to this script)')
+    parser.add_argument('--password', help='Password of an encrypted statement')
+    parser.add_argument('--output-dir', type=Path, default=base_dir / 'importdata',
+                        help='Directory for the generated files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU, at most one per task)')
+    parser.add_argument('--match-houses', type=Path, nargs='+', metavar='IMPORT_FILE',
+                        help='Security dues import files whose houses deposits are matched against')
+    args = parser.parse_args()
+
+    output_dir = args.output_dir
+    output_dir.mkdir(exist_ok=True)
+
+    matcher = None
+    if args.match_houses:
+        matcher = load_matcher(args.match_houses)
+        print(f"Loaded {len(matcher.house_numbers)} houses for matching")
+
+    transactions_file = output_dir / 'bank_statement_transactions.ndjson'
+    try:
+        summary = process_statement(args.input_file, transactions_file, args.password, args.workers, matcher)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("\nGenerating output files...")
+    print(f"  Created: {transactions_file}")
+
+    summary_file = output_dir / 'bank_statement_summary.json'
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"  Created: {summary_file}")
+
+    # Print summary
+    stats = summary['statistics']
+    print("\n" + "="*60)
+    print("STATEMENT SUMMARY")
+    print("="*60)
+    print(f"\nAccount: {summary['statement'].get('account_number')} ({summary['statement'].get('period')})")
+    print(f"Transactions: {stats['transactions']} ({stats['credits']} deposits, {stats['debits']} withdrawals)")
+    print(f"Running balance mismatches: {stats['balance_mismatches']}")
+    if 'matched_deposits' in stats:
+        print(f"Deposits matched to a house: {stats['matched_deposits']} of {stats['credits']}")
+    for key, check in summary['totals_check'].items():
+        status = 'OK' if check['matches'] else 'MISMATCH'
+        print(f"  {key}: statement ₦{check['statement']:,.2f}, extracted ₦{check['extracted']:,.2f} [{status}]")
+
+    print("\n" + "="*60)
+    print("Output files saved to:", output_dir)
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ Security Dues Processor for Residio
 Processes legacy Excel payment tracker spreadsheets and generates structured JSON output.
 """
 
+import argparse
 import json
 import openpyxl
 from openpyxl.styles import PatternFill
@@ -389,13 +390,21 @@ def generate_summary(clean_houses, flagged_houses, flags_summary, all_houses, so
 
     return summary
 
-def main():
+def main(argv=None):
     """Main processing function."""
 
     # File paths
     base_dir = Path(__file__).parent
-    input_file = base_dir / 'ResidioTest.xlsx'
-    output_dir = base_dir / 'importdata'
+
+    parser = argparse.ArgumentParser(description='Process a legacy security dues tracker (v1 interpretation).')
+    parser.add_argument('input_file', nargs='?', type=Path, default=base_dir / 'ResidioTest.xlsx',
+                        help='Tracker workbook (default: ResidioTest.xlsx next to this script)')
+    parser.add_argument('--output-dir', type=Path, default=base_dir / 'importdata',
+                        help='Directory for the generated JSON files')
+    args = parser.parse_args(argv)
+
+    input_file = args.input_file
+    output_dir = args.output_dir
 
     # Ensure output directory exists
     output_dir.mkdir(exist_ok=True)
@@ -4,14 +4,38 @@ Security Dues Processor for Residio - Version 2
 Processes legacy Excel payment tracker spreadsheets and generates structured JSON output.
 """
 
+import argparse
+import cProfile
 import json
-import openpyxl
+import os
+import pstats
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from collections import defaultdict
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 import re
 
-# Column positions (1-indexed) - ACTUAL STRUCTURE
+from dues_block_cache import BlockCache, fingerprint_rows
+from dues_delta import diff_runs, read_run, write_delta
+from dues_metrics import RunMetrics
+from dues_layout import HEADER_SCAN_COLS, HEADER_SCAN_ROWS, LayoutCache, LayoutRows, is_header_row, workbook_fingerprint
+from dues_ledger import EstateLedger, build_house_ledgers
+from dues_names import NameIndex
+from dues_ndjson import NdjsonHouseWriter
+from dues_occupancy import row_mask
+from dues_records import House, flag_bit
+from dues_snapshot import SnapshotStore
+from dues_sqlite import read_resolutions, write_staging_db
+from dues_summary import SummaryAccumulator, print_report
+from dues_tensor import PaymentTensor
+from xlsx_stream_reader import XlsxReader
+
+# Column positions (1-indexed) of the canonical row layout. Sheets are mapped
+# to it by header text (see dues_layout), so these match the v2 tracker's A-S.
 COL_HOUSE_NO = 1
 COL_STATUS = 2
 COL_NAME = 3
@@ -21,13 +45,17 @@ COL_RATE = 6
 COL_JAN = 7
 COL_DEC = 18
 COL_PAID = 19
-# Note: DUE DEBT column doesn't appear to exist in this sheet
 
 MONTH_COLS = list(range(COL_JAN, COL_DEC + 1))
-MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
-# Start row for data (after header)
-DATA_START_ROW = 16
+# Amount cells parsed per year row: rate, Jan-Dec and PAID
+AMOUNT_CELLS = COL_PAID - COL_RATE + 1
+
+# Allowed gap (₦) between the month cells and the PAID column
+VARIANCE_THRESHOLD = 100
+
+# Workbook readers: openpyxl, or the streaming XML reader in xlsx_stream_reader
+ENGINES = ('openpyxl', 'native')
 
 def get_rgb_from_cell(cell):
     """Extract RGB values from cell fill."""
@@ -53,46 +81,127 @@ def get_rgb_from_cell(cell):
     except:
         return None
 
-def is_yellow_fill(cell):
-    """Check if cell has yellow fill."""
-    rgb = get_rgb_from_cell(cell)
-    if not rgb:
-        return False
-    r, g, b = rgb
-    # Yellow: high R and G, low B
-    return r > 200 and g > 200 and b < 150
+# Highlight classes a fill colour can resolve to
+HIGHLIGHT_NONE = 'none'
+HIGHLIGHT_YELLOW = 'yellow'  # primary resident name
+HIGHLIGHT_BLUE = 'blue'      # move-in month
+HIGHLIGHT_RED = 'red'        # move-out month
 
-def is_blue_fill(cell):
-    """Check if cell has blue fill."""
-    rgb = get_rgb_from_cell(cell)
+def classify_rgb(rgb):
+    """Map an (r, g, b) fill colour to its highlight class."""
     if not rgb:
-        return False
+        return HIGHLIGHT_NONE
     r, g, b = rgb
+    # Yellow: high R and G, low B
+    if r > 200 and g > 200 and b < 150:
+        return HIGHLIGHT_YELLOW
     # Blue: low R and G, high B
-    return b > 150 and r < 150 and g < 150
-
-def is_red_fill(cell):
-    """Check if cell has red fill."""
-    rgb = get_rgb_from_cell(cell)
-    if not rgb:
-        return False
-    r, g, b = rgb
+    if b > 150 and r < 150 and g < 150:
+        return HIGHLIGHT_BLUE
     # Red: high R, low G and B
-    return r > 200 and g < 150 and b < 150
+    if r > 200 and g < 150 and b < 150:
+        return HIGHLIGHT_RED
+    return HIGHLIGHT_NONE
+
+class FillClassifier:
+    """Resolve cell fills to highlight classes, parsing each distinct style once.
+
+    Cells that share a style share the same fill, so the class is cached on the
+    cell's style index (the fill index for regular cells, the cell-format index
+    for read-only cells) and every later cell with that style is a dict lookup.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, cell):
+        """Return the highlight class of a cell's fill."""
+        style = getattr(cell, '_style', None)
+        if style is not None:
+            key = style.fillId
+        else:
+            key = ('xf', getattr(cell, '_style_id', None))
+
+        highlight = self._cache.get(key)
+        if highlight is not None:
+            self.hits += 1
+            return highlight
+
+        self.misses += 1
+        highlight = classify_rgb(get_rgb_from_cell(cell))
+        self._cache[key] = highlight
+        return highlight
+
+    def merge(self, other):
+        """Fold in the cache and counters of a classifier used by a worker process."""
+        self._cache.update(other._cache)
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def stats(self):
+        """Lookup counters for the run report."""
+        lookups = self.hits + self.misses
+        return {
+            'lookups': lookups,
+            'distinct_styles': len(self._cache),
+            'hits': self.hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
 
-def parse_currency(value):
-    """Parse currency value, handling various formats."""
-    if value is None or value == '':
+# Characters dropped from currency strings: naira sign, thousands separators, spaces
+CURRENCY_STRIP = str.maketrans('', '', '₦, ')
+
+# Distinct currency strings remembered by parse_currency_text()
+CURRENCY_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=CURRENCY_CACHE_SIZE)
+def parse_currency_text(text):
+    """Parse a currency string such as '5,000', '₦10,000' or '(2,000)'; None if it is not a number.
+
+    Trackers repeat the same few strings thousands of times, so results are
+    memoized on the raw string.
+    """
+    cleaned = text.translate(CURRENCY_STRIP).strip()
+    if not cleaned:
         return 0.0
-    if isinstance(value, (int, float)):
-        return float(value)
-    cleaned = str(value).replace('₦', '').replace(',', '').replace(' ', '').strip()
     if cleaned.startswith('(') and cleaned.endswith(')'):
         cleaned = '-' + cleaned[1:-1]
     try:
-        return float(cleaned) if cleaned else 0.0
-    except:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def parse_currency(value):
+    """Parse currency value, handling various formats (0.0 if it cannot be parsed)."""
+    if value is None:
         return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    amount = parse_currency_text(value if isinstance(value, str) else str(value))
+    return 0.0 if amount is None else amount
+
+def parse_currency_cells(values):
+    """Parse a run of currency cells at once.
+
+    Returns (amounts, failures): cells that cannot be parsed become 0.0 in
+    amounts and are counted in failures.
+    """
+    amounts = []
+    failures = 0
+    for value in values:
+        if value is None:
+            amounts.append(0.0)
+        elif isinstance(value, (int, float)):
+            amounts.append(float(value))
+        else:
+            amount = parse_currency_text(value if isinstance(value, str) else str(value))
+            if amount is None:
+                failures += 1
+                amount = 0.0
+            amounts.append(amount)
+    return amounts, failures
 
 def extract_street_code(house_number):
     """Extract street code from house number."""
@@ -101,76 +210,298 @@ def extract_street_code(house_number):
     match = re.match(r'(\d+)', str(house_number).strip())
     return match.group(1) if match else str(house_number).strip()
 
-def process_spreadsheet(file_path):
-    """Process the Excel spreadsheet and extract payment data."""
-
-    print(f"Loading spreadsheet: {file_path}")
-    wb = openpyxl.load_workbook(file_path, data_only=True)
-    ws = wb.active
-
-    houses = {}
-    current_house = None
-    row_count = 0
-
-    print(f"\nProcessing from row {DATA_START_ROW} to {ws.max_row}...")
-
-    for row_idx in range(DATA_START_ROW, ws.max_row + 1):
-        row = list(ws[row_idx])
+def iter_data_rows(ws, min_row=1, max_col=HEADER_SCAN_COLS, max_row=None):
+    """Yield (row_idx, cells) for the first max_col cells of each row from min_row to max_row (default: the end).
+
+    Both modes read through iter_rows(); only the workbook load mode differs. A
+    read-only (streaming) worksheet parses rows lazily from the sheet XML, so
+    memory stays flat, while a loaded worksheet already holds every cell.
+    """
+    yield from enumerate(ws.iter_rows(min_row=min_row, max_row=max_row, max_col=max_col), min_row)
+
+def iter_openpyxl_rows(file_path, fills, streaming=False, sheet=None, min_row=1, max_col=HEADER_SCAN_COLS,
+                       metrics=None, max_row=None):
+    """Yield (row_idx, values, highlights) for the leading columns of each row, read through openpyxl."""
+    # Imported here so the native engine and --help never load openpyxl
+    import openpyxl
+
+    metrics = metrics or RunMetrics()
+    with metrics.stage('workbook_load'):
+        wb = openpyxl.load_workbook(file_path, data_only=True, read_only=streaming)
+        ws = wb[sheet] if sheet else wb.active
+    print(f"\nProcessing {ws.title!r} from row {min_row} to {max_row or ws.max_row}...")
+    try:
+        for row_idx, row in iter_data_rows(ws, min_row, max_col, max_row):
+            cells = row[:max_col]
+            with metrics.stage('highlight_detection'):
+                highlights = [fills.classify(cell) for cell in cells]
+            yield row_idx, [cell.value for cell in cells], highlights
+    finally:
+        if streaming:
+            wb.close()
+
+def iter_native_rows(file_path, sheet=None, min_row=1, max_col=HEADER_SCAN_COLS, metrics=None, max_row=None):
+    """Yield (row_idx, values, highlights) for the leading columns of each row, read from the sheet XML.
+
+    Fill colours are resolved once per cell format from styles.xml, so each cell's
+    highlight is a list lookup on its style index.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage('workbook_load'):
+        reader = XlsxReader(file_path)
+        with metrics.stage('highlight_detection'):
+            style_highlights = [classify_rgb(rgb) for rgb in reader.style_rgb]
+    with reader:
+        print(f"\nProcessing {sheet or reader.sheets[reader.active_index][0]!r} from row {min_row}"
+              + (f" to {max_row}" if max_row else "") + f" ({len(style_highlights)} cell styles resolved)...")
+        for row_idx, values, style_ids in reader.iter_rows(sheet, min_row=min_row, max_col=max_col):
+            if max_row and row_idx > max_row:
+                break
+            yield row_idx, values, [style_highlights[style_id] for style_id in style_ids]
+
+def open_rows(file_path, engine, fills, streaming=False, sheet=None, layout=None, metrics=None,
+              min_row=None, max_row=None, snapshots=None):
+    """Data rows of a sheet (default: the active one), in canonical column order.
+
+    Returns a LayoutRows iterable. With a known layout, reading starts at its
+    data row (or min_row, if later); otherwise the header is detected from the
+    same read. max_row stops reading early.
+
+    With a SnapshotStore, a snapshot of the sheet replaces the workbook read.
+    Without one, a full read of the sheet is taken from row 1 at the header
+    scan width and written as its snapshot for the next run.
+    """
+    record = snapshots is not None and min_row is None and max_row is None
+    if layout is not None:
+        min_row, max_col = max(layout.data_start_row, min_row or 1), layout.width
+    else:
+        min_row, max_col = 1, HEADER_SCAN_COLS
+    if snapshots is not None:
+        metrics = metrics or RunMetrics()
+        with metrics.stage('snapshot_load'):
+            snapshot = snapshots.open(engine, sheet)
+        if snapshot is not None:
+            print(f"\nProcessing {sheet or 'active sheet'!r} from snapshot ({snapshot.num_rows} rows) "
+                  f"from row {min_row}" + (f" to {max_row}" if max_row else "") + "...")
+            return LayoutRows(snapshot.iter_rows(min_row, max_col, max_row), layout)
+    if record:
+        # LayoutRows skips the rows before the data and the columns outside the layout
+        min_row, max_col = 1, HEADER_SCAN_COLS
+    if engine == 'native':
+        raw_rows = iter_native_rows(file_path, sheet, min_row, max_col, metrics, max_row)
+    else:
+        raw_rows = iter_openpyxl_rows(file_path, fills, streaming, sheet, min_row, max_col, metrics, max_row)
+    if record:
+        raw_rows = snapshots.recording(raw_rows, engine, sheet, max_col)
+    return LayoutRows(raw_rows, layout)
+
+def find_data_sheets(file_path, engine='openpyxl'):
+    """Names of the worksheets with a HOUSE NO header row near the top."""
+    sheets = []
+    if engine == 'native':
+        with XlsxReader(file_path) as reader:
+            for name, _ in reader.sheets:
+                for row_idx, values, _ in reader.iter_rows(name, max_col=HEADER_SCAN_COLS):
+                    if row_idx > HEADER_SCAN_ROWS:
+                        break
+                    if is_header_row(values):
+                        sheets.append(name)
+                        break
+        return sheets
+
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+    try:
+        for ws in wb.worksheets:
+            header_rows = ws.iter_rows(max_row=HEADER_SCAN_ROWS, max_col=HEADER_SCAN_COLS, values_only=True)
+            if any(is_header_row(row) for row in header_rows if row):
+                sheets.append(ws.title)
+    finally:
+        wb.close()
+    return sheets
+
+def iter_sheet_values(file_path, engine='openpyxl', sheet=None, min_row=1, max_col=HEADER_SCAN_COLS,
+                      snapshots=None):
+    """Yield (row_idx, values) for the leading columns of each row, without fills or styles.
+
+    With a SnapshotStore holding a snapshot of the sheet, values come from it.
+    """
+    snapshot = snapshots.open(engine, sheet) if snapshots is not None else None
+    if snapshot is not None:
+        for row_idx, values, _ in snapshot.iter_rows(min_row, max_col):
+            yield row_idx, values
+        return
+
+    if engine == 'native':
+        with XlsxReader(file_path) as reader:
+            for row_idx, values, _ in reader.iter_rows(sheet, min_row=min_row, max_col=max_col):
+                yield row_idx, values
+        return
+
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        yield from enumerate(ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True), min_row)
+    finally:
+        wb.close()
+
+def detect_layout(file_path, engine='openpyxl', sheet=None, snapshots=None):
+    """Layout of a sheet from its header row, reading only the first rows."""
+    rows = LayoutRows((row_idx, values, values) for row_idx, values in
+                      iter_sheet_values(file_path, engine, sheet, snapshots=snapshots))
+    # The layout is settled by the time the first data row comes out
+    next(iter(rows), None)
+    return rows.layout
+
+def find_block_starts(file_path, layout, engine='openpyxl', sheet=None, snapshots=None):
+    """Rows where house blocks start, and the last row of the sheet.
+
+    Reads only the house number column, applying the same rule as
+    iter_raw_blocks(): a block starts on a row with a house number that is not
+    a repeated header.
+    """
+    house_col = layout.columns['house_no']
+    starts = []
+    last_row = layout.header_row
+    for row_idx, values in iter_sheet_values(file_path, engine, sheet, layout.data_start_row, house_col,
+                                             snapshots):
+        last_row = row_idx
+        house_no = values[house_col - 1] if len(values) >= house_col else None
+        if house_no and str(house_no).strip() and 'HOUSE' not in str(house_no).strip().upper():
+            starts.append(row_idx)
+    return starts, last_row
+
+def shard_ranges(block_starts, first_row, last_row, shards):
+    """Split rows first_row..last_row into up to shards (min_row, max_row) ranges of similar size.
+
+    Every cut is at a block start, so each range holds whole house blocks; the
+    first range also takes any rows before the first block, the last runs to
+    the end of the sheet (max_row None).
+    """
+    span = last_row - first_row + 1
+    cuts = []
+    for k in range(1, shards):
+        i = bisect_left(block_starts, first_row + span * k // shards)
+        if i < len(block_starts) and block_starts[i] > first_row and (not cuts or block_starts[i] > cuts[-1]):
+            cuts.append(block_starts[i])
+    bounds = [first_row] + cuts
+    return [(start, end - 1) for start, end in zip(bounds, cuts)] + [(bounds[-1], None)]
+
+def new_house(house_no):
+    """Empty house record for a house number seen for the first time."""
+    return House(house_no, extract_street_code(house_no))
+
+def parse_year_row(values, highlights, year):
+    """Read the rate, PAID total and monthly payments of a data row.
+
+    Returns (rate, paid, payments, move_in_months, move_out_months, unparsed).
+    The move months are 12-bit masks (bit 0 = Jan) of the blue and red month
+    cells; unparsed counts the amount cells that were not numbers. Flags are
+    left for validate_years(), which checks all year rows at once.
+    """
+
+    # Rate, the twelve months and PAID are adjacent columns, parsed in one batch
+    amounts, unparsed = parse_currency_cells(values[COL_RATE - 1:COL_PAID])
+    rate = amounts[0]
+    payments = amounts[COL_JAN - COL_RATE:COL_DEC - COL_RATE + 1]
+    paid_total = amounts[COL_PAID - COL_RATE]
+
+    # Detect move-in/move-out highlights on the month cells
+    move_in_months = 0
+    move_out_months = 0
+
+    for i, month_col_idx in enumerate(MONTH_COLS):
+        highlight = highlights[month_col_idx - 1]
+
+        # Check for blue highlight (move-in)
+        if highlight == HIGHLIGHT_BLUE:
+            move_in_months |= 1 << i
+
+        # Check for red highlight (move-out)
+        elif highlight == HIGHLIGHT_RED:
+            move_out_months |= 1 << i
+
+    return rate, paid_total, payments, move_in_months, move_out_months, unparsed
+
+def last_month_key(year, month_bits):
+    """'YYYY-MM' of the latest month set in a row's 12-bit month mask."""
+    return f"{year}-{month_bits.bit_length():02d}"
+
+def iter_raw_blocks(rows, counters):
+    """Split data rows into house blocks, yielding (house_number, rows) per block.
+
+    A block starts on a row with a house number and runs until the next one.
+    Header rows are dropped and rows before the first house number are ignored.
+    """
+    house_no = None
+    block_rows = []
+
+    for values, highlights in rows:
+        counters['rows_scanned'] += 1
 
         # Get house number
-        house_no_cell = row[COL_HOUSE_NO - 1]
-        house_no_raw = house_no_cell.value
+        house_no_raw = values[COL_HOUSE_NO - 1]
 
         # Check if this is a new house block
         if house_no_raw and str(house_no_raw).strip():
-            house_no = str(house_no_raw).strip()
+            row_house_no = str(house_no_raw).strip()
 
             # Skip if it looks like a header row
-            if 'HOUSE' in house_no.upper():
+            if 'HOUSE' in row_house_no.upper():
                 continue
 
-            if house_no not in houses:
-                current_house = house_no
-                houses[current_house] = {
-                    'house_number': house_no,
-                    'street_code': extract_street_code(house_no),
-                    'primary_name': None,
-                    'aliases': [],
-                    'move_in_month': None,
-                    'move_out_month': None,
-                    'status': 'ACTIVE',
-                    'years': [],
-                    'flags': [],
-                    'property_type': 'residential',
-                    'rate_tier': None
-                }
-                print(f"  Found house: {house_no}")
-            else:
-                current_house = house_no
+            if house_no is not None:
+                yield house_no, block_rows
+            house_no = row_house_no
+            block_rows = []
 
-        if not current_house:
+        if house_no is None:
             continue
 
+        block_rows.append((values, highlights))
+
+    if house_no is not None:
+        yield house_no, block_rows
+
+def parse_block(house_no, block_rows):
+    """Parse the rows of one house block.
+
+    The block carries the names (in row order, with their yellow highlight),
+    year rows (packed as in House.year_numbers/year_values/year_move_ins/
+    year_move_outs) and move-in/move-out months it contains, both as month
+    keys and as occupancy calendar bits, plus the resume bits of year rows
+    that show a resident without a move highlight (see
+    dues_occupancy.OccupancyCalendar); apply_block() folds blocks into the
+    house map exactly as a single pass over the rows would.
+    """
+    block = {
+        'house_number': house_no,
+        'names': [],
+        'year_numbers': array('i'),
+        'year_values': array('d'),
+        'year_move_ins': array('H'),
+        'year_move_outs': array('H'),
+        'move_in_month': None,
+        'move_out_month': None,
+        'move_in_bits': 0,
+        'move_out_bits': 0,
+        'resume_bits': 0,
+        'inactive': False,
+        'unparsed_cells': 0
+    }
+
+    for values, highlights in block_rows:
         # Get resident name
-        name_cell = row[COL_NAME - 1]
-        name = name_cell.value
-
-        if name and str(name).strip():
-            name = str(name).strip()
-
-            # Check for yellow highlight (primary name)
-            if is_yellow_fill(name_cell):
-                houses[current_house]['primary_name'] = name
-            elif not houses[current_house]['primary_name']:
-                houses[current_house]['primary_name'] = name
-            elif name != houses[current_house]['primary_name'] and name not in houses[current_house]['aliases']:
-                # Different name, add as alias
-                if name not in houses[current_house]['aliases']:
-                    houses[current_house]['aliases'].append(name)
+        name = values[COL_NAME - 1]
+        has_name = bool(name and str(name).strip())
+
+        if has_name:
+            # Yellow highlight marks the primary name
+            block['names'].append((str(name).strip(), highlights[COL_NAME - 1] == HIGHLIGHT_YELLOW))
 
         # Get year
-        year_cell = row[COL_YEAR - 1]
-        year = year_cell.value
+        year = values[COL_YEAR - 1]
 
         # Must have a valid year to process payment data
         if not year or not isinstance(year, (int, float)):
@@ -182,168 +513,374 @@ def process_spreadsheet(file_path):
         if year >= 2026:
             continue
 
-        # Get rate
-        rate_cell = row[COL_RATE - 1]
-        rate = parse_currency(rate_cell.value)
-
-        # Extract monthly payments
-        payments = {}
-        move_in_detected = None
-        move_out_detected = None
+        rate, paid_total, payments, move_in_months, move_out_months, unparsed = \
+            parse_year_row(values, highlights, year)
+        block['unparsed_cells'] += unparsed
+
+        if move_in_months:
+            block['move_in_bits'] |= row_mask(year, move_in_months)
+            if not block['move_in_month']:
+                block['move_in_month'] = last_month_key(year, move_in_months)
+
+        if move_out_months:
+            block['move_out_bits'] |= row_mask(year, move_out_months)
+            block['move_out_month'] = last_month_key(year, move_out_months)
+            block['inactive'] = True
+
+        # A resident on a row with no move highlight: occupied again after any earlier move-out
+        if not move_in_months and not move_out_months and (has_name or paid_total or any(payments)):
+            block['resume_bits'] |= row_mask(year, 1)
+
+        block['year_numbers'].append(year)
+        block['year_values'].append(rate)
+        block['year_values'].append(paid_total)
+        block['year_values'].extend(payments)
+        block['year_move_ins'].append(move_in_months)
+        block['year_move_outs'].append(move_out_months)
+
+    return block
+
+def iter_house_blocks(rows, counters, cache=None):
+    """Group data rows into house blocks and parse each block on its own.
+
+    With a BlockCache, each block is fingerprinted first and a block whose
+    cells are unchanged since the cached run is reused instead of parsed.
+    """
+    for house_no, block_rows in iter_raw_blocks(rows, counters):
+        if cache is None:
+            block = parse_block(house_no, block_rows)
+            counters['cells_parsed'] += len(block['year_numbers']) * AMOUNT_CELLS
+        else:
+            fingerprint = fingerprint_rows(block_rows)
+            block = cache.get(fingerprint)
+            if block is None:
+                block = parse_block(house_no, block_rows)
+                block['fingerprint'] = fingerprint
+                counters['cells_parsed'] += len(block['year_numbers']) * AMOUNT_CELLS
+                counters['blocks_recomputed'] += 1
+            else:
+                counters['blocks_reused'] += 1
+
+        counters['year_rows'] += len(block['year_numbers'])
+        counters['unparsed_cells'] += block['unparsed_cells']
+        yield block
+
+def apply_block(houses, block):
+    """Merge a parsed house block into the house map, keyed by house number."""
+    house_no = block['house_number']
+    house = houses.get(house_no)
+    if house is None:
+        house = houses[house_no] = new_house(house_no)
+        print(f"  Found house: {house_no}")
+
+    for name, is_primary in block['names']:
+        if is_primary:
+            house.primary_name = name
+        elif not house.primary_name:
+            house.primary_name = name
+        else:
+            # Different name (ignoring case and spacing), add as alias
+            house.add_alias(name)
+
+    # Update move-in/move-out if detected
+    if block['move_in_month'] and not house.move_in_month:
+        house.move_in_month = block['move_in_month']
+
+    if block['move_out_month']:
+        house.move_out_month = block['move_out_month']
+
+    if block['inactive']:
+        house.status = 'INACTIVE'
+
+    house.move_in_bits |= block['move_in_bits']
+    house.move_out_bits |= block['move_out_bits']
+    house.resume_bits |= block['resume_bits']
+
+    house.extend_years(block['year_numbers'], block['year_values'], block['year_move_ins'],
+                       block['year_move_outs'])
+
+def new_counters():
+    """Row and block counters for the run report."""
+    return {'rows_scanned': 0, 'year_rows': 0, 'blocks_reused': 0, 'blocks_recomputed': 0, 'unparsed_cells': 0,
+            'cells_parsed': 0}
+
+def parse_sheet(file_path, sheet, engine='openpyxl', streaming=False, cache=None, layout=None, row_range=None,
+                snapshots=None):
+    """Parse one worksheet into its ordered house blocks. Runs in a worker process.
+
+    row_range (min_row, max_row), with a known layout, limits parsing to that
+    shard of the sheet. snapshots is passed to open_rows(). Returns the blocks, counters, fill classifier, the
+    sheet layout used and the worker's RunMetrics.
+    """
+    counters = new_counters()
+    fills = FillClassifier()
+    metrics = RunMetrics()
+    min_row, max_row = row_range or (None, None)
+    with metrics.stage('row_parsing'):
+        rows = open_rows(file_path, engine, fills, streaming, sheet, layout, metrics, min_row, max_row, snapshots)
+        blocks = list(iter_house_blocks(rows, counters, cache))
+    return blocks, counters, fills, rows.layout, metrics
+
+def parse_sheets_parallel(file_path, sheets, engine='openpyxl', streaming=False, workers=None, cache=None,
+                          layouts=None, snapshots=None):
+    """Parse several worksheets in a process pool, one task per sheet, in sheet order."""
+    workers = workers or min(len(sheets), os.cpu_count() or 1)
+    layouts = layouts or [None] * len(sheets)
+    print(f"\nParsing {len(sheets)} sheets with {workers} worker processes...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_sheet, repeat(file_path), sheets, repeat(engine), repeat(streaming),
+                            repeat(cache), layouts, repeat(None), repeat(snapshots))
+
+def parse_shards_parallel(file_path, layout, ranges, engine='openpyxl', streaming=False, workers=None, cache=None,
+                          snapshots=None):
+    """Parse row ranges of the active sheet in a process pool, one task per range, in row order."""
+    workers = workers or min(len(ranges), os.cpu_count() or 1)
+    print(f"\nParsing {len(ranges)} shards with {workers} worker processes...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_sheet, repeat(file_path), repeat(None), repeat(engine), repeat(streaming),
+                            repeat(cache), repeat(layout), ranges, repeat(snapshots))
+
+def block_cache_layout():
+    """Parsing rules a cached block depends on; a change invalidates the cache."""
+    return {
+        'interpretation_version': '2.0',
+        'columns': [COL_HOUSE_NO, COL_NAME, COL_YEAR, COL_RATE, COL_JAN, COL_DEC, COL_PAID]
+    }
 
-        for i, month_col_idx in enumerate(MONTH_COLS):
-            month_name = MONTH_NAMES[i]
-            month_cell = row[month_col_idx - 1]
-            amount = parse_currency(month_cell.value)
+def process_spreadsheet(file_path, streaming=False, engine='openpyxl', all_sheets=False, workers=None,
+                        block_cache=None, on_house=None, layout_cache=None, metrics=None, shards=None,
+                        snapshot_dir=None):
+    """Process the Excel spreadsheet and extract payment data.
 
-            payments[month_name] = amount
+    By default only the active sheet is read. With all_sheets, every data sheet
+    is parsed in parallel and house blocks are merged in workbook tab order, as
+    if the tabs had been stacked into one sheet.
 
-            # Check for blue highlight (move-in)
-            if is_blue_fill(month_cell):
-                move_in_detected = f"{year}-{i+1:02d}"
+    With shards > 1 the active sheet is split into that many row ranges at
+    house block starts (found by a pass over the house number column only),
+    the ranges are parsed in parallel and their blocks applied in row order,
+    so a house number that reappears further down merges as in one pass.
 
-            # Check for red highlight (move-out)
-            if is_red_fill(month_cell):
-                move_out_detected = f"{year}-{i+1:02d}"
-                houses[current_house]['status'] = 'INACTIVE'
+    With a BlockCache, unchanged house blocks are taken from the cache and every
+    block of this run is recorded in it; the caller saves it for the next run.
+    on_house is passed to finalize_houses().
 
-        # Update move-in/move-out if detected
-        if move_in_detected and not houses[current_house]['move_in_month']:
-            houses[current_house]['move_in_month'] = move_in_detected
+    Each sheet's header row and column layout are detected while it is read.
+    With a LayoutCache, layouts (and the data sheet list) found for this exact
+    workbook are reused, so reading starts at the first data row.
 
-        if move_out_detected:
-            houses[current_house]['move_out_month'] = move_out_detected
+    With a snapshot_dir, the cells read from each sheet are kept there as a
+    binary snapshot (see dues_snapshot) keyed by the workbook's content hash,
+    and later runs on the unchanged workbook read the snapshot instead of the
+    workbook. Sharded runs use a snapshot but do not write one.
 
-        # Get PAID total
-        paid_cell = row[COL_PAID - 1]
-        paid_total = parse_currency(paid_cell.value)
+    Stage times and row, cell and fill counters are added to metrics (a
+    RunMetrics). With all_sheets or shards, the workers' stage times are summed
+    and the parent's wait for them is the sheet_merge (shard_merge) stage.
+    """
 
-        # Cross-validation
-        monthly_sum = sum(payments.values())
-        variance = abs(monthly_sum - paid_total)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
 
-        year_flags = []
-        if variance > 100:  # Allow ₦100 variance
-            year_flags.append('SUM_MISMATCH')
+    print(f"Loading spreadsheet: {file_path}" + (" (streaming)" if streaming else "") + f" [{engine}]")
 
-        # Calculate expected (rate * 12 for full year)
-        expected = rate * 12
+    houses = {}
+    counters = new_counters()
+    fills = FillClassifier()
+    metrics = metrics if metrics is not None else RunMetrics()
+
+    start_time = time.perf_counter()
+
+    fingerprint = workbook_fingerprint(file_path) if layout_cache is not None or snapshot_dir else None
+    snapshots = SnapshotStore(snapshot_dir, fingerprint) if snapshot_dir else None
+
+    def cached_layout(sheet):
+        return layout_cache.get(fingerprint, sheet) if layout_cache is not None else None
+
+    def record_layout(sheet, layout):
+        print(f"Layout of {sheet or 'active sheet'!r}: {layout.describe()}")
+        if layout_cache is not None:
+            layout_cache.put(fingerprint, sheet, layout)
+
+    def apply_parsed(blocks, part_counters, part_fills, part_metrics):
+        for block in blocks:
+            apply_block(houses, block)
+            if block_cache is not None:
+                block_cache.put(block)
+        for key, value in part_counters.items():
+            counters[key] += value
+        fills.merge(part_fills)
+        metrics.merge(part_metrics)
+
+    if all_sheets:
+        sheets = layout_cache.get_data_sheets(fingerprint) if layout_cache is not None else None
+        if sheets is None:
+            with metrics.stage('sheet_discovery'):
+                sheets = find_data_sheets(file_path, engine)
+            if layout_cache is not None:
+                layout_cache.put_data_sheets(fingerprint, sheets)
+        print(f"Found {len(sheets)} data sheets: {', '.join(sheets)}")
+        with metrics.stage('sheet_merge'):
+            for sheet, (blocks, sheet_counters, sheet_fills, layout, sheet_metrics) in zip(
+                    sheets, parse_sheets_parallel(file_path, sheets, engine, streaming, workers, block_cache,
+                                                  [cached_layout(sheet) for sheet in sheets], snapshots)):
+                record_layout(sheet, layout)
+                apply_parsed(blocks, sheet_counters, sheet_fills, sheet_metrics)
+    elif shards and shards > 1:
+        with metrics.stage('block_discovery'):
+            layout = cached_layout(None) or detect_layout(file_path, engine, snapshots=snapshots)
+            block_starts, last_row = find_block_starts(file_path, layout, engine, snapshots=snapshots)
+            ranges = shard_ranges(block_starts, layout.data_start_row, last_row, shards)
+        print(f"Found {len(block_starts)} block starts in rows {layout.data_start_row}-{last_row}; "
+              f"shards: {', '.join(f'{start}-{end or last_row}' for start, end in ranges)}")
+        with metrics.stage('shard_merge'):
+            for blocks, shard_counters, shard_fills, _, shard_metrics in parse_shards_parallel(
+                    file_path, layout, ranges, engine, streaming, workers, block_cache, snapshots):
+                apply_parsed(blocks, shard_counters, shard_fills, shard_metrics)
+        record_layout(None, layout)
+    else:
+        with metrics.stage('row_parsing'):
+            rows = open_rows(file_path, engine, fills, streaming, layout=cached_layout(None), metrics=metrics,
+                             snapshots=snapshots)
+            for block in iter_house_blocks(rows, counters, block_cache):
+                apply_block(houses, block)
+                if block_cache is not None:
+                    block_cache.put(block)
+        record_layout(None, rows.layout)
+
+    elapsed = time.perf_counter() - start_time
+    rows_scanned = counters['rows_scanned']
+
+    print(f"\nProcessed {counters['year_rows']} data rows")
+    print(f"Scanned {rows_scanned} rows in {elapsed:.2f}s ({rows_scanned / elapsed if elapsed else 0:,.0f} rows/sec)")
+    if counters['unparsed_cells']:
+        print(f"Unparsed amount cells: {counters['unparsed_cells']} (counted as 0)")
+    if engine == 'openpyxl':
+        fill_stats = fills.stats()
+        print(f"Fill lookups: {fill_stats['lookups']} across {fill_stats['distinct_styles']} styles "
+              f"({fill_stats['hit_rate']:.1%} cache hits)")
+    if block_cache is not None:
+        print(f"Blocks: {counters['blocks_reused']} reused from cache, "
+              f"{counters['blocks_recomputed']} recomputed")
+    print(f"Found {len(houses)} house blocks")
 
-        # Year balance is expected - paid
-        year_balance = expected - paid_total
+    for key, value in counters.items():
+        metrics.count(key, value)
+    metrics.count('rows_skipped', rows_scanned - counters['year_rows'])
+    metrics.count('houses', len(houses))
+    if engine == 'openpyxl':
+        metrics.count('fill_lookups', fills.stats()['lookups'])
+
+    with metrics.stage('post_processing'):
+        return finalize_houses(houses, on_house)
+
+def validate_years(houses):
+    """Cross-validate every year row in one batched pass.
+
+    Sets the SUM_MISMATCH bit on year rows whose month cells disagree with the
+    PAID column, adds SUM_MISMATCH to the house flags, and returns the
+    PaymentTensor the check ran on. expected and year_balance are derived from
+    rate and paid by the records themselves.
+    """
+    tensor = PaymentTensor.from_houses(houses)
+    mismatch = tensor.sum_mismatch(VARIANCE_THRESHOLD)
+    mismatch_bit = flag_bit('SUM_MISMATCH')
+
+    offset = 0
+    for house_data in houses.values():
+        num_years = house_data.num_years
+        flagged = mismatch[offset:offset + num_years].nonzero()[0]
+        for i in flagged.tolist():
+            house_data.year_flags[i] |= mismatch_bit
+        if len(flagged) and 'SUM_MISMATCH' not in house_data.flags:
+            house_data.flags.append('SUM_MISMATCH')
+        offset += num_years
+
+    return tensor
+
+def finalize_houses(houses, on_house=None):
+    """Validate, total and classify the parsed houses into clean and flagged records.
+
+    on_house(house, flagged) is called for each house as soon as it is final,
+    so writers can stream it out without waiting for the whole estate. The
+    summary totals are accumulated in the same pass and returned in place of
+    a separate flags breakdown.
+    """
 
-        # Add year data
-        houses[current_house]['years'].append({
-            'year': year,
-            'rate': rate,
-            'payments': payments,
-            'paid': paid_total,
-            'expected': expected,
-            'year_balance': year_balance,
-            'flags': year_flags
-        })
+    # Remove houses with no years
+    houses = {k: v for k, v in houses.items() if v.num_years}
 
-        # Update house flags
-        for flag in year_flags:
-            if flag not in houses[current_house]['flags']:
-                houses[current_house]['flags'].append(flag)
+    # Occupancy calendars decide each year's chargeable months, and so the expected dues
+    for house_data in houses.values():
+        house_data.build_calendar()
 
-        row_count += 1
+    tensor = validate_years(houses)
 
-    print(f"\nProcessed {row_count} data rows")
-    print(f"Found {len(houses)} house blocks")
+    # Month-level running balances, for balance-as-of queries
+    for house_data, ledger in zip(houses.values(), build_house_ledgers(tensor)):
+        house_data.ledger = ledger
 
-    # Post-processing
-    for house_no, house_data in houses.items():
-        # Skip houses with no year data
-        if not house_data['years']:
-            continue
+    # Net position across all years, for every house at once
+    total_expected, total_paid, net_position = (values.tolist() for values in tensor.house_totals())
 
-        # Calculate net position across all years
-        total_expected = sum(year['expected'] for year in house_data['years'])
-        total_paid = sum(year['paid'] for year in house_data['years'])
-        net_position = total_paid - total_expected
+    clean_houses = []
+    flagged_houses = []
+    stats = SummaryAccumulator()
+    stats.add_tensor(tensor)
 
-        house_data['summary'] = {
-            'total_expected': total_expected,
-            'total_paid': total_paid,
-            'net_position': net_position,
-            'net_position_type': 'credit' if net_position > 0 else 'debt' if net_position < 0 else 'balanced',
+    # Post-processing
+    for h, (house_no, house_data) in enumerate(houses.items()):
+        house_data.summary = {
+            'total_expected': total_expected[h],
+            'total_paid': total_paid[h],
+            'net_position': net_position[h],
+            'net_position_type': 'credit' if net_position[h] > 0 else 'debt' if net_position[h] < 0 else 'balanced',
             'currency': 'NGN'
         }
 
         # Set rate tier
-        if not house_data['rate_tier'] and house_data['years']:
-            latest_rate = house_data['years'][-1]['rate']
+        if not house_data.rate_tier and house_data.num_years:
+            latest_rate = house_data.years[-1].rate
             if latest_rate == 5000:
-                house_data['rate_tier'] = 'TIER_1'
+                house_data.rate_tier = 'TIER_1'
             elif latest_rate == 7000:
-                house_data['rate_tier'] = 'TIER_2'
+                house_data.rate_tier = 'TIER_2'
             elif latest_rate == 10000:
-                house_data['rate_tier'] = 'TIER_3'
+                house_data.rate_tier = 'TIER_3'
             else:
-                house_data['rate_tier'] = 'OTHERS'
+                house_data.rate_tier = 'OTHERS'
 
         # Ensure primary name exists
-        if not house_data['primary_name']:
-            house_data['flags'].append('NO_PRIMARY_NAME')
-            house_data['primary_name'] = f"Resident at {house_no}"
+        if not house_data.primary_name:
+            house_data.flags.append('NO_PRIMARY_NAME')
+            house_data.primary_name = f"Resident at {house_no}"
 
-    # Remove houses with no years
-    houses = {k: v for k, v in houses.items() if v['years']}
-
-    # Separate clean and flagged records
-    clean_houses = []
-    flagged_houses = []
-    flags_summary = defaultdict(int)
-
-    for house_no, house_data in houses.items():
-        if house_data['flags']:
+        # Separate clean and flagged records
+        flagged = bool(house_data.flags)
+        if flagged:
             flagged_houses.append(house_data)
-            for flag in house_data['flags']:
-                flags_summary[flag] += 1
         else:
             clean_houses.append(house_data)
 
+        stats.add(house_data, flagged)
+
+        if on_house is not None:
+            on_house(house_data, flagged)
+
     print(f"\nResults:")
     print(f"  Clean records: {len(clean_houses)}")
     print(f"  Flagged records: {len(flagged_houses)}")
 
-    return clean_houses, flagged_houses, flags_summary, houses
+    return clean_houses, flagged_houses, stats, houses
 
-def generate_summary(clean_houses, flagged_houses, flags_summary, all_houses, source_file):
-    """Generate processing summary report."""
+def generate_summary(stats, source_file):
+    """Generate processing summary report from the SummaryAccumulator of a run."""
 
-    total_houses = len(all_houses)
-    total_residents = sum(1 + len(h.get('aliases', [])) for h in all_houses.values())
-
-    # Financial summary
-    total_expected = sum(h['summary']['total_expected'] for h in all_houses.values())
-    total_paid = sum(h['summary']['total_paid'] for h in all_houses.values())
-    net_position = total_paid - total_expected
-
-    total_debt = sum(abs(h['summary']['net_position']) for h in all_houses.values()
-                     if h['summary']['net_position'] < 0)
-    total_credit = sum(h['summary']['net_position'] for h in all_houses.values()
-                       if h['summary']['net_position'] > 0)
-
-    # Data period
-    all_years = set()
-    for house in all_houses.values():
-        for year_data in house['years']:
-            all_years.add(year_data['year'])
-
-    min_year = min(all_years) if all_years else None
-    max_year = max(all_years) if all_years else None
+    net_position = stats.net_position
 
     # Rate history
-    rate_history = defaultdict(set)
-    for house in all_houses.values():
-        for year_data in house['years']:
-            rate_history[year_data['year']].add(year_data['rate'])
-
     rate_history_formatted = {
-        str(year): sorted(list(rates)) for year, rates in sorted(rate_history.items())
+        str(year): rates for year, rates in stats.rate_history().items()
     }
 
     summary = {
@@ -354,121 +891,331 @@ def generate_summary(clean_houses, flagged_houses, flags_summary, all_houses, so
             'processor': 'Security Dues Processor for Residio v2'
         },
         'statistics': {
-            'total_houses': total_houses,
-            'clean_records': len(clean_houses),
-            'flagged_records': len(flagged_houses),
-            'total_residents': total_residents,
-            'active_houses': sum(1 for h in all_houses.values() if h['status'] == 'ACTIVE'),
-            'inactive_houses': sum(1 for h in all_houses.values() if h['status'] == 'INACTIVE')
+            'total_houses': stats.total_houses,
+            'clean_records': stats.clean_records,
+            'flagged_records': stats.flagged_records,
+            'total_residents': stats.total_residents,
+            'active_houses': stats.active_houses,
+            'inactive_houses': stats.inactive_houses
         },
         'financial_summary': {
-            'total_expected': total_expected,
-            'total_paid': total_paid,
-            'total_debt': total_debt,
-            'total_credit': total_credit,
+            'total_expected': stats.total_expected,
+            'total_paid': stats.total_paid,
+            'total_debt': stats.total_debt,
+            'total_credit': stats.total_credit,
             'net_position': net_position,
             'net_position_type': 'credit' if net_position > 0 else 'debt' if net_position < 0 else 'balanced',
             'currency': 'NGN'
         },
         'data_period': {
-            'start_year': min_year,
-            'end_year': max_year,
-            'years_covered': len(all_years),
+            'start_year': stats.start_year,
+            'end_year': stats.end_year,
+            'years_covered': len(stats.years),
             'note': 'Historical data only (years prior to 2026). Residio starts 2026 with calculated Net Position.'
         },
         'rate_history': rate_history_formatted,
-        'flags_breakdown': dict(flags_summary),
+        'flags_breakdown': dict(stats.flags),
         'validation_results': {
             'cross_validation_performed': True,
-            'variance_threshold': 100,
+            'variance_threshold': VARIANCE_THRESHOLD,
             'highlight_detection_enabled': True
         }
     }
 
     return summary
 
-def main():
-    """Main processing function."""
-
-    base_dir = Path(__file__).parent
-    input_file = base_dir / 'ResidioTest.xlsx'
-    output_dir = base_dir / 'importdata'
-
-    output_dir.mkdir(exist_ok=True)
+def write_import_files(clean_houses, flagged_houses, stats, source_file, export_date, main_file, flagged_file):
+    """Write the main and flagged import JSON documents."""
 
-    # Process spreadsheet
-    clean_houses, flagged_houses, flags_summary, all_houses = process_spreadsheet(input_file)
-
-    print("\nGenerating output files...")
-
-    # 1. Main import file
     main_output = {
         'export_metadata': {
-            'export_date': datetime.now().isoformat(),
-            'source_file': str(input_file.name),
+            'export_date': export_date,
+            'source_file': source_file,
             'interpretation_version': '2.0',
             'total_houses': len(clean_houses),
             'data_period': {
-                'start_year': min((year['year'] for h in clean_houses for year in h['years']), default=None),
-                'end_year': max((year['year'] for h in clean_houses for year in h['years']), default=None)
+                'start_year': stats.clean_start_year,
+                'end_year': stats.clean_end_year
             }
         },
-        'houses': clean_houses
+        'houses': [house.to_dict() for house in clean_houses]
     }
 
-    main_file = output_dir / 'security_dues_import_main.json'
     with open(main_file, 'w') as f:
         json.dump(main_output, f, indent=2)
     print(f"  Created: {main_file}")
 
-    # 2. Flagged records file
     flagged_output = {
         'export_metadata': {
-            'export_date': datetime.now().isoformat(),
-            'source_file': str(input_file.name),
+            'export_date': export_date,
+            'source_file': source_file,
             'interpretation_version': '2.0',
             'total_houses': len(flagged_houses),
             'note': 'These records require manual review before import'
         },
-        'houses': flagged_houses
+        'houses': [house.to_dict() for house in flagged_houses]
     }
 
-    flagged_file = output_dir / 'security_dues_import_flagged.json'
     with open(flagged_file, 'w') as f:
         json.dump(flagged_output, f, indent=2)
     print(f"  Created: {flagged_file}")
 
+def parse_month(text):
+    """'YYYY-MM' -> (year, month), for argparse."""
+    try:
+        year, month = map(int, text.split('-'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {text!r}")
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"month out of range in {text!r}")
+    return year, month
+
+def main(argv=None):
+    """Main processing function."""
+
+    base_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description='Process a legacy security dues tracker into import JSON.')
+    parser.add_argument('input_file', nargs='?', type=Path, default=base_dir / 'ResidioTest.xlsx',
+                        help='Tracker workbook (default: ResidioTest.xlsx next to this script)')
+    parser.add_argument('--output-dir', type=Path, default=base_dir / 'importdata',
+                        help='Directory for the generated JSON files')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Read the sheet row by row in read-only mode instead of loading it whole')
+    parser.add_argument('--engine', choices=ENGINES, default='openpyxl',
+                        help='Workbook reader: openpyxl, or native to stream the sheet XML directly')
+    parser.add_argument('--all-sheets', action='store_true',
+                        help='Parse every data sheet in parallel and merge houses across tabs')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --all-sheets or --shards (default: one per task, up to the CPU count)')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='Split the active sheet into this many row ranges at house blocks and parse them in parallel')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse parsed house blocks whose cells are unchanged since the last --incremental run')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='Keep a binary snapshot of the sheet cells in the output directory and read it instead '
+                             'of the workbook while the workbook is unchanged')
+    parser.add_argument('--output-format', choices=('json', 'ndjson'), default='json',
+                        help='json: indented documents; ndjson: one compact record per house, streamed as finalized')
+    parser.add_argument('--delta', nargs='?', const=True, metavar='PREVIOUS_DIR',
+                        help='Also write the houses added, changed and removed since the run in PREVIOUS_DIR '
+                             '(default: the output directory, read before it is overwritten); '
+                             'with --load, only those are loaded')
+    parser.add_argument('--load', nargs='?', const=True, metavar='DSN',
+                        help='Also upsert the houses into Postgres (default DSN: the local Supabase database)')
+    parser.add_argument('--balance-as-of', nargs='+', type=parse_month, default=[], metavar='YYYY-MM',
+                        help='Also write every house balance as of the end of these months')
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write Parquet tables of monthly payments (partitioned by year) and houses')
+    parser.add_argument('--profile', action='store_true',
+                        help='Run under cProfile and save the profile next to the outputs')
+    args = parser.parse_args(argv)
+
+    if args.shards and args.all_sheets:
+        parser.error("--shards splits the active sheet; it cannot be combined with --all-sheets")
+
+    input_file = args.input_file
+    output_dir = args.output_dir
+
+    output_dir.mkdir(exist_ok=True)
+
+    block_cache = None
+    block_cache_file = output_dir / 'security_dues_block_cache.json'
+    if args.incremental:
+        block_cache = BlockCache.load(block_cache_file, block_cache_layout())
+
+    layout_cache_file = output_dir / 'security_dues_layout_cache.json'
+    layout_cache = LayoutCache.load(layout_cache_file)
+
+    # The previous run's houses, read before this run replaces them
+    previous_metadata = previous_houses = None
+    if args.delta:
+        previous_dir = output_dir if args.delta is True else Path(args.delta)
+        previous_metadata, previous_houses = read_run(previous_dir)
+        if previous_houses:
+            print(f"Previous run: {len(previous_houses)} houses from {previous_metadata.get('export_date')}")
+        else:
+            print(f"No previous run in {previous_dir}; every house will be added")
+
+    # Optional exporters are imported only when asked for; pyarrow and psycopg are slow to load
+    if args.parquet:
+        from dues_parquet import export_parquet, pa
+        if pa is None:
+            parser.error("--parquet needs the pyarrow package")
+
+    loader = None
+    if args.load:
+        from dues_postgres import LOCAL_DSN, PostgresLoader
+        try:
+            loader = PostgresLoader(LOCAL_DSN if args.load is True else args.load)
+        except RuntimeError as e:
+            parser.error(str(e))
+
+    export_date = datetime.now().isoformat()
+    main_file = output_dir / f'security_dues_import_main.{args.output_format}'
+    flagged_file = output_dir / f'security_dues_import_flagged.{args.output_format}'
+
+    writers = None
+    on_house = None
+    if args.output_format == 'ndjson':
+        # Houses are written as they are finalized; totals go in each file's trailer
+        writers = {
+            False: NdjsonHouseWriter(main_file, {
+                'export_date': export_date,
+                'source_file': str(input_file.name),
+                'interpretation_version': '2.0'
+            }),
+            True: NdjsonHouseWriter(flagged_file, {
+                'export_date': export_date,
+                'source_file': str(input_file.name),
+                'interpretation_version': '2.0',
+                'note': 'These records require manual review before import'
+            })
+        }
+
+        def on_house(house, flagged):
+            with metrics.stage('json_writing'):
+                writers[flagged].write_house(house)
+
+    metrics = RunMetrics()
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # Process spreadsheet
+    try:
+        clean_houses, flagged_houses, stats, all_houses = process_spreadsheet(
+            input_file, streaming=args.streaming, engine=args.engine,
+            all_sheets=args.all_sheets, workers=args.workers, block_cache=block_cache,
+            on_house=on_house, layout_cache=layout_cache, metrics=metrics, shards=args.shards,
+            snapshot_dir=output_dir / 'security_dues_snapshots' if args.snapshot else None)
+    except BaseException:
+        # No partial NDJSON imports: the previous run's files are left as they were
+        if writers is not None:
+            for writer in writers.values():
+                writer.discard()
+        raise
+
+    print("\nGenerating output files...")
+
+    with metrics.stage('json_writing'):
+        if writers is not None:
+            for writer in writers.values():
+                writer.close()
+                print(f"  Created: {writer.path}")
+        else:
+            # 1. Main import file, 2. Flagged records file
+            write_import_files(clean_houses, flagged_houses, stats, str(input_file.name), export_date,
+                               main_file, flagged_file)
+
     # 3. Summary report
-    summary = generate_summary(clean_houses, flagged_houses, flags_summary, all_houses, str(input_file.name))
+    with metrics.stage('summary_generation'):
+        summary = generate_summary(stats, str(input_file.name))
 
     summary_file = output_dir / 'security_dues_export_summary.json'
-    with open(summary_file, 'w') as f:
+    with metrics.stage('json_writing'), open(summary_file, 'w') as f:
         json.dump(summary, f, indent=2)
     print(f"  Created: {summary_file}")
 
+    # 4. Near-duplicate resident names for review before import
+    with metrics.stage('name_groups'):
+        name_groups = NameIndex.from_houses(all_houses).groups()
+    name_groups_file = output_dir / 'security_dues_name_groups.json'
+    with metrics.stage('json_writing'), open(name_groups_file, 'w') as f:
+        json.dump({'source_file': str(input_file.name), 'groups': name_groups}, f, indent=2)
+    print(f"  Created: {name_groups_file}")
+
+    # 5. Staging database for flagged-record review, keeping earlier resolutions
+    staging_file = output_dir / 'security_dues_staging.sqlite'
+    with metrics.stage('staging_db'):
+        resolutions = read_resolutions(staging_file)
+        staging_counts = write_staging_db(all_houses.values(), staging_file)
+    print(f"  Created: {staging_file} ({staging_counts['flags']} flags, {len(resolutions)} resolutions kept, "
+          f"{staging_counts['open_flags']} open)")
+
+    # 6. Changes since the previous run
+    delta = None
+    if previous_houses is not None:
+        delta_file = output_dir / 'security_dues_import_delta.json'
+        with metrics.stage('delta_export'):
+            delta = diff_runs(previous_houses, all_houses.values())
+            write_delta(delta, delta_file, {
+                'export_date': export_date,
+                'source_file': str(input_file.name),
+                'interpretation_version': '2.0',
+                'previous_export_date': previous_metadata.get('export_date')
+            })
+        print(f"  Created: {delta_file} ({len(delta['added'])} added, {len(delta['changed'])} changed, "
+              f"{len(delta['removed'])} removed, {delta['unchanged']} unchanged)")
+
+    # 7. Columnar tables for analysis
+    if args.parquet:
+        parquet_dir = output_dir / 'security_dues_parquet'
+        with metrics.stage('parquet_export'):
+            num_payments, num_houses = export_parquet(all_houses.values(), parquet_dir)
+        print(f"  Created: {parquet_dir} ({num_payments} payment rows, {num_houses} houses)")
+
+    # 8. Balances as of the requested months, one batched query per month
+    if args.balance_as_of:
+        balances_file = output_dir / 'security_dues_balances.json'
+        with metrics.stage('ledger_queries'):
+            estate_ledger = EstateLedger.from_houses(all_houses.values())
+            balances = [estate_ledger.summary_as_of(year, month) for year, month in args.balance_as_of]
+        with metrics.stage('json_writing'), open(balances_file, 'w') as f:
+            json.dump({'source_file': str(input_file.name), 'balances': balances}, f, indent=2)
+        print(f"  Created: {balances_file} ({', '.join(b['month'] for b in balances)})")
+
+    with metrics.stage('cache_writing'):
+        # 9. Detected sheet layouts for the next run on this workbook
+        layout_cache.save(layout_cache_file)
+        print(f"  Created: {layout_cache_file}")
+
+        # 10. Block cache for the next incremental run
+        if block_cache is not None:
+            block_cache.save(block_cache_file)
+            print(f"  Created: {block_cache_file}")
+
+    # Load into Postgres in one transaction; with --delta only what changed
+    if loader is not None:
+        print("\nLoading into Postgres...")
+        if delta is not None:
+            load_houses = [all_houses[record['house_number']] for record in delta['added'] + delta['changed']]
+            removed = [record['house_number'] for record in delta['removed']]
+        else:
+            load_houses, removed = all_houses.values(), ()
+        with metrics.stage('postgres_load'), loader:
+            loader.load(load_houses, str(input_file.name), removed)
+
+    # 11. Profile, if asked for
+    if profiler is not None:
+        profiler.disable()
+        profile_file = output_dir / 'security_dues_profile.prof'
+        profiler.dump_stats(profile_file)
+        print(f"  Created: {profile_file} (python -m pstats {profile_file.name})")
+
+    # 12. Run metrics
+    metrics_file = output_dir / 'security_dues_metrics.json'
+    metrics.save(metrics_file, source_file=str(input_file.name), export_date=export_date, engine=args.engine,
+                 streaming=args.streaming, all_sheets=args.all_sheets, shards=args.shards,
+                 incremental=args.incremental, delta=bool(args.delta), snapshot=args.snapshot)
+    print(f"  Created: {metrics_file}")
+
     # Print summary
-    print("\n" + "="*60)
-    print("PROCESSING SUMMARY")
-    print("="*60)
-    print(f"\nTotal Houses Processed: {summary['statistics']['total_houses']}")
-    print(f"  Clean Records: {summary['statistics']['clean_records']}")
-    print(f"  Flagged Records: {summary['statistics']['flagged_records']}")
-    print(f"  Total Residents: {summary['statistics']['total_residents']}")
-    print(f"\nStatus:")
-    print(f"  Active: {summary['statistics']['active_houses']}")
-    print(f"  Inactive: {summary['statistics']['inactive_houses']}")
-    print(f"\nFinancial Summary (NGN):")
-    print(f"  Total Expected: ₦{summary['financial_summary']['total_expected']:,.2f}")
-    print(f"  Total Paid: ₦{summary['financial_summary']['total_paid']:,.2f}")
-    print(f"  Total Debt: ₦{summary['financial_summary']['total_debt']:,.2f}")
-    print(f"  Total Credit: ₦{summary['financial_summary']['total_credit']:,.2f}")
-    print(f"  Net Position: ₦{summary['financial_summary']['net_position']:,.2f} ({summary['financial_summary']['net_position_type']})")
-    print(f"\nData Period: {summary['data_period']['start_year']} - {summary['data_period']['end_year']}")
-    print(f"Years Covered: {summary['data_period']['years_covered']}")
-
-    if flags_summary:
+    print_report(summary)
+
+    print(f"Similar Name Groups: {len(name_groups)}")
+
+    print()
+    for line in metrics.report():
+        print(line)
+    if profiler is not None:
+        print("\nSlowest functions (cumulative):")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(12)
+
+    if stats.flags:
         print(f"\nFlags Breakdown:")
-        for flag, count in sorted(flags_summary.items()):
+        for flag, count in sorted(stats.flags.items()):
             print(f"  {flag}: {count}")
 
     print("\n" + "="*60)
@@ -0,0 +1,62 @@
+"""Tests for occupancy calendars and the chargeable months they give year rows."""
+
+from dues_occupancy import YEAR_MASK, OccupancyCalendar, row_mask
+from process_security_dues_v2 import (COL_JAN, COL_NAME, COL_PAID, COL_RATE, COL_YEAR, HIGHLIGHT_BLUE,
+                                      HIGHLIGHT_RED, apply_block, parse_block)
+
+def year_row(year, paid=0, name=None, move_in=(), move_out=()):
+    """Canonical (values, highlights) of one year row; move months are 1-12."""
+    values = [None] * COL_PAID
+    highlights = [None] * COL_PAID
+    values[COL_NAME - 1] = name
+    values[COL_YEAR - 1] = year
+    values[COL_RATE - 1] = 5000
+    values[COL_PAID - 1] = paid
+    for month in move_in:
+        highlights[COL_JAN + month - 2] = HIGHLIGHT_BLUE
+    for month in move_out:
+        highlights[COL_JAN + month - 2] = HIGHLIGHT_RED
+    return values, highlights
+
+def build_house(*blocks):
+    houses = {}
+    for rows in blocks:
+        apply_block(houses, parse_block('3 B', rows))
+    house = houses['3 B']
+    house.build_calendar()
+    return house
+
+def test_move_out_then_later_block_with_payments_is_charged():
+    house = build_house(
+        [year_row(2023, paid=40000, name='OLD RESIDENT', move_out=(9,))],
+        [year_row(2025, paid=140000, name='NEW RESIDENT'), year_row(2024)])
+
+    assert house.chargeable_months(2023) == 9
+    # No resident shows up in 2024, so the house stays vacant until 2025
+    assert house.chargeable_months(2024) == 0
+    assert house.chargeable_months(2025) == 12
+    assert house.calendar.vacancy_gaps() == [('2023-10', '2024-12')]
+
+def test_move_out_with_no_later_resident_stays_vacant():
+    house = build_house([year_row(2024), year_row(2023, paid=40000, name='OLD RESIDENT', move_out=(9,))])
+
+    assert house.chargeable_months(2023) == 9
+    assert house.chargeable_months(2024) == 0
+
+def test_resume_does_not_override_first_move_in():
+    # Rows before the first move-in do not make the house occupied from the start
+    calendar = OccupancyCalendar.from_events(
+        move_ins=row_mask(2023, 1 << 4), move_outs=0, first_year=2022, last_year=2023,
+        resumes=row_mask(2022, 1) | row_mask(2023, 1))
+
+    assert calendar.chargeable_bits(2022) == 0
+    # Moved in in May: May and June are free
+    assert calendar.chargeable_months(2023) == 6
+
+def test_move_in_after_move_out_keeps_free_months():
+    calendar = OccupancyCalendar.from_events(
+        move_ins=row_mask(2024, 1 << 2), move_outs=row_mask(2023, 1 << 8), first_year=2023, last_year=2024)
+
+    # Vacant October 2023 to February 2024, then March and April are free
+    assert calendar.vacancy_gaps() == [('2023-10', '2024-02')]
+    assert calendar.chargeable_bits(2024) == YEAR_MASK & ~0b1111
@@ -0,0 +1,85 @@
+"""Tests for the Postgres bulk loader.
+
+They need a database: set DUES_POSTGRES_DSN (e.g. to dues_postgres.LOCAL_DSN
+after `supabase start`). Tables are created in a throwaway schema that is
+dropped afterwards.
+"""
+
+import os
+
+import pytest
+
+import dues_postgres
+from dues_records import House
+
+DSN = os.environ.get('DUES_POSTGRES_DSN')
+
+pytestmark = pytest.mark.skipif(not DSN or dues_postgres.psycopg is None,
+                                reason='set DUES_POSTGRES_DSN and install psycopg to run the Postgres tests')
+
+TEST_SCHEMA = 'legacy_dues_test'
+
+def make_house(house_number, name, aliases, years):
+    """A finalized-looking House with full-year charges; years maps year -> monthly amount."""
+    house = House(house_number, house_number.split()[0])
+    house.primary_name = name
+    for alias in aliases:
+        house.add_alias(alias)
+    for year, amount in years.items():
+        house.add_year(year, 5000.0, amount * 12, [amount] * 12)
+    house.summary = {'total_expected': 60000.0 * len(years), 'total_paid': 12 * sum(years.values()),
+                     'net_position': 12 * sum(years.values()) - 60000.0 * len(years)}
+    return house
+
+def make_houses():
+    return [
+        make_house('3 B', 'IKENNA MBACHU', ['I. MBACHU'], {2024: 5000.0, 2025: 5000.0}),
+        make_house('7 A', 'ADA OBI', [], {2025: 0.0})
+    ]
+
+def table_counts(loader):
+    with loader.pool.connection() as conn:
+        return {name: conn.execute(f"SELECT count(*) FROM {TEST_SCHEMA}.{name}").fetchone()[0]
+                for name, *_ in dues_postgres.TABLES}
+
+@pytest.fixture
+def loader(monkeypatch):
+    monkeypatch.setattr(dues_postgres, 'SCHEMA', TEST_SCHEMA)
+    with dues_postgres.PostgresLoader(DSN) as loader:
+        yield loader
+        with loader.pool.connection() as conn:
+            conn.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+
+def test_identical_reload_changes_nothing(loader):
+    first = loader.load(make_houses(), 'test.xlsx')
+    assert {name: counts['upserted'] for name, counts in first.items()} == {
+        'houses': 2, 'residents': 2, 'aliases': 1, 'yearly_dues': 3, 'monthly_payments': 24}
+
+    second = loader.load(make_houses(), 'test.xlsx')
+    assert all(counts['upserted'] == 0 for counts in second.values())
+    assert all(counts.get('deleted', 0) == 0 for counts in second.values())
+    assert table_counts(loader) == {'houses': 2, 'residents': 2, 'aliases': 1, 'yearly_dues': 3,
+                                    'monthly_payments': 24}
+
+def test_reload_deletes_stale_rows(loader):
+    loader.load(make_houses(), 'test.xlsx')
+
+    # 3 B loses its alias and its 2025 row; 7 A is not in this run and stays
+    house = make_house('3 B', 'IKENNA MBACHU', [], {2024: 5000.0})
+    counts = loader.load([house], 'test.xlsx')
+
+    assert counts['aliases']['deleted'] == 1
+    assert counts['yearly_dues']['deleted'] == 1
+    assert counts['monthly_payments']['deleted'] == 12
+    assert counts['houses']['upserted'] == 1
+    assert table_counts(loader) == {'houses': 2, 'residents': 2, 'aliases': 0, 'yearly_dues': 2,
+                                    'monthly_payments': 12}
+
+def test_removed_houses_cascade(loader):
+    loader.load(make_houses(), 'test.xlsx')
+
+    counts = loader.load([], 'test.xlsx', removed=['3 B'])
+
+    assert counts['houses']['deleted'] == 1
+    assert table_counts(loader) == {'houses': 1, 'residents': 1, 'aliases': 0, 'yearly_dues': 1,
+                                    'monthly_payments': 0}
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Streaming XLSX reader for legacy dues trackers.
+Reads worksheet XML incrementally, without building openpyxl objects, and returns
+plain cell values plus style indices for the leading columns of each row.
+"""
+
+import datetime
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import fromstring, iterparse
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+ROW_TAG = NS_MAIN + 'row'
+CELL_TAG = NS_MAIN + 'c'
+VALUE_TAG = NS_MAIN + 'v'
+TEXT_TAG = NS_MAIN + 't'
+RUN_TAG = NS_MAIN + 'r'
+INLINE_STRING_TAG = NS_MAIN + 'is'
+SHEET_DATA_TAG = NS_MAIN + 'sheetData'
+
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# Built-in number formats that openpyxl treats as dates or durations
+BUILTIN_DATE_FORMATS = {
+    14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy', 18: 'h:mm AM/PM',
+    19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss', 22: 'm/d/yy h:mm',
+    45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0'
+}
+
+# Same rules openpyxl uses to decide a custom format is a date/duration
+STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+DATE_TOKEN_RE = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+def is_date_format(fmt):
+    """Check if a number format code renders dates or times."""
+    if fmt is None:
+        return False
+    fmt = STRIP_RE.sub('', fmt.split(';')[0])
+    return DATE_TOKEN_RE.search(fmt) is not None
+
+def is_timedelta_format(fmt):
+    """Check if a number format code renders elapsed time."""
+    if fmt is None:
+        return False
+    return TIMEDELTA_RE.search(fmt.split(';')[0]) is not None
+
+def hex_to_rgb(rgb):
+    """Parse an ARGB/RGB hex string into an (r, g, b) tuple."""
+    if not rgb:
+        return None
+    if len(rgb) == 8:
+        rgb = rgb[2:]  # Remove alpha (ARGB -> RGB)
+    if len(rgb) < 6:
+        return None
+    try:
+        return (int(rgb[0:2], 16), int(rgb[2:4], 16), int(rgb[4:6], 16))
+    except ValueError:
+        return None
+
+def column_index(ref):
+    """Convert the column letters of a cell reference ('S22') to a 1-based index."""
+    index = 0
+    for char in ref:
+        if char.isdigit():
+            break
+        index = index * 26 + (ord(char) - 64)
+    return index
+
+def cast_number(value):
+    """Convert a numeric cell string to int or float, as openpyxl does."""
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+def from_excel(value, epoch, timedelta=False):
+    """Convert an Excel serial number to a datetime, time or timedelta."""
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            td = datetime.timedelta(seconds=td.total_seconds() // 1,
+                                    microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return datetime.time(hours, mins, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+def text_content(node):
+    """Plain text of a shared/inline string node, ignoring phonetic runs."""
+    snippets = []
+    text = node.findtext(TEXT_TAG)
+    if text is not None:
+        snippets.append(text)
+    for run in node.iterfind(RUN_TAG):
+        text = run.findtext(TEXT_TAG)
+        if text is not None:
+            snippets.append(text)
+    return ''.join(snippets)
+
+class XlsxReader:
+    """Read-only view of an .xlsx package that streams worksheet rows.
+
+    Shared strings and styles are read once when the reader is opened. Each
+    cell-format (xf) index is resolved to the RGB of its fill foreground, so
+    callers can classify highlights with a list lookup per cell.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._zip = zipfile.ZipFile(file_path)
+        self.sheets, self.active_index, self.epoch = self._read_workbook()
+        self.shared_strings = self._read_shared_strings()
+        self.style_rgb, self.date_styles, self.timedelta_styles = self._read_styles()
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_xml(self, part):
+        return fromstring(self._zip.read(part))
+
+    def _read_workbook(self):
+        """Return [(sheet name, part path)], the active sheet index and the date epoch."""
+        workbook = self._read_xml('xl/workbook.xml')
+        rels = self._read_xml('xl/_rels/workbook.xml.rels')
+        targets = {}
+        for rel in rels.iter(NS_PKG_REL + 'Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[rel.get('Id')] = target
+
+        sheets = [
+            (sheet.get('name'), targets[sheet.get(NS_REL + 'id')])
+            for sheet in workbook.iter(NS_MAIN + 'sheet')
+        ]
+
+        active_index = 0
+        view = workbook.find(f'{NS_MAIN}bookViews/{NS_MAIN}workbookView')
+        if view is not None:
+            active_index = int(view.get('activeTab', 0))
+
+        epoch = WINDOWS_EPOCH
+        props = workbook.find(NS_MAIN + 'workbookPr')
+        if props is not None and props.get('date1904') in ('1', 'true'):
+            epoch = MAC_EPOCH
+
+        return sheets, active_index, epoch
+
+    def _read_shared_strings(self):
+        if 'xl/sharedStrings.xml' not in self._zip.namelist():
+            return []
+        strings = []
+        with self._zip.open('xl/sharedStrings.xml') as src:
+            for _, node in iterparse(src):
+                if node.tag == NS_MAIN + 'si':
+                    strings.append(text_content(node).replace('x005F_', ''))
+                    node.clear()
+        return strings
+
+    def _read_styles(self):
+        """Resolve every cell-format index to its fill RGB and date-ness."""
+        if 'xl/styles.xml' not in self._zip.namelist():
+            return [None], set(), set()
+        styles = self._read_xml('xl/styles.xml')
+
+        custom_formats = {
+            int(fmt.get('numFmtId')): fmt.get('formatCode')
+            for fmt in styles.iterfind(f'{NS_MAIN}numFmts/{NS_MAIN}numFmt')
+        }
+
+        fill_rgb = []
+        for fill in styles.iterfind(f'{NS_MAIN}fills/{NS_MAIN}fill'):
+            color = fill.find(f'{NS_MAIN}patternFill/{NS_MAIN}fgColor')
+            fill_rgb.append(hex_to_rgb(color.get('rgb')) if color is not None else None)
+
+        style_rgb = []
+        date_styles = set()
+        timedelta_styles = set()
+        for idx, xf in enumerate(styles.iterfind(f'{NS_MAIN}cellXfs/{NS_MAIN}xf')):
+            fill_id = int(xf.get('fillId', 0))
+            style_rgb.append(fill_rgb[fill_id] if fill_id < len(fill_rgb) else None)
+
+            num_fmt_id = int(xf.get('numFmtId', 0))
+            fmt = custom_formats.get(num_fmt_id, BUILTIN_DATE_FORMATS.get(num_fmt_id))
+            if is_date_format(fmt):
+                date_styles.add(idx)
+            if is_timedelta_format(fmt):
+                timedelta_styles.add(idx)
+
+        return style_rgb or [None], date_styles, timedelta_styles
+
+    def sheet_part(self, sheet=None):
+        """Part path of a sheet given by name or index (default: the active sheet)."""
+        if sheet is None:
+            sheet = self.active_index
+        if isinstance(sheet, int):
+            return self.sheets[sheet][1]
+        for name, part in self.sheets:
+            if name == sheet:
+                return part
+        raise KeyError(f"Worksheet {sheet} does not exist.")
+
+    def iter_rows(self, sheet=None, min_row=1, max_col=None):
+        """Yield (row_idx, values, style_ids) for every stored row from min_row.
+
+        values and style_ids are lists of length max_col (cells beyond it are
+        skipped; missing cells are None with style 0). Rows absent from the sheet
+        XML are not yielded.
+        """
+        part = self.sheet_part(sheet)
+        shared_strings = self.shared_strings
+        date_styles = self.date_styles
+        timedelta_styles = self.timedelta_styles
+        epoch = self.epoch
+        columns = {}
+        row_counter = 0
+
+        with self._zip.open(part) as src:
+            sheet_data = None
+            for event, node in iterparse(src, events=('start', 'end')):
+                if event == 'start':
+                    if node.tag == SHEET_DATA_TAG:
+                        sheet_data = node
+                    continue
+                if node.tag != ROW_TAG:
+                    continue
+
+                row_attr = node.get('r')
+                row_counter = int(row_attr) if row_attr else row_counter + 1
+                if row_counter < min_row:
+                    sheet_data.clear()
+                    continue
+
+                width = max_col or 0
+                values = [None] * width
+                style_ids = [0] * width
+                col_counter = 0
+
+                for cell in node.iterfind(CELL_TAG):
+                    ref = cell.get('r')
+                    if ref:
+                        letters = ref.rstrip('0123456789')
+                        col = columns.get(letters)
+                        if col is None:
+                            col = columns[letters] = column_index(letters)
+                        col_counter = col
+                    else:
+                        col_counter += 1
+                        col = col_counter
+                    if max_col and col > max_col:
+                        break
+                    if col > len(values):
+                        values.extend([None] * (col - len(values)))
+                        style_ids.extend([0] * (col - len(style_ids)))
+
+                    style_attr = cell.get('s')
+                    style_id = int(style_attr) if style_attr else 0
+                    style_ids[col - 1] = style_id
+
+                    data_type = cell.get('t', 'n')
+                    if data_type == 'inlineStr':
+                        child = cell.find(INLINE_STRING_TAG)
+                        values[col - 1] = text_content(child) if child is not None else None
+                        continue
+
+                    value = cell.findtext(VALUE_TAG) or None
+                    if value is None:
+                        continue
+                    if data_type == 'n':
+                        value = cast_number(value)
+                        if style_id in date_styles:
+                            try:
+                                value = from_excel(value, epoch, timedelta=style_id in timedelta_styles)
+                            except (OverflowError, ValueError):
+                                value = '#VALUE!'
+                    elif data_type == 's':
+                        value = shared_strings[int(value)]
+                    elif data_type == 'b':
+                        value = bool(int(value))
+                    elif data_type == 'd':
+                        value = datetime.datetime.fromisoformat(value.rstrip('Z'))
+                    values[col - 1] = value
+
+                sheet_data.clear()
+                yield row_counter, values, style_ids